@@ -0,0 +1,134 @@
+"""Throughput of the vectorized batch API against the per-row scalar path.
+
+Generates a synthetic population (every question answered uniformly at
+random, q6 as a ``;``-joined string column the way survey exports store
+it), scores it with core.batch.categorize_table() and reports rows per
+second. It also scores the first --scalar-rows rows with encode_answers() +
+get_recommendations(). Those rows are compared with the batch result, and
+the command exits non-zero on any mismatch::
+
+    python -m benchmarks.batch_bench
+    python -m benchmarks.batch_bench --rows 100000 --output batch.json
+
+Setup reports the process's one-time costs: the code -> decision-key
+array and the decision table. The throughput figures exclude them.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from core.batch import MULTI_SEPARATOR, categorize_codes, code_keys, pack_table
+from core.decision_table import CATEGORIES, get_decision_table
+from core.methods_data import get_catalog
+from core.quiz_logic import get_recommendations
+from core.schema import QUIZ_QUESTIONS, encode_answers
+
+
+def synthetic_population(rows: int, seed: int) -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    table = {}
+    for q_id, question in QUIZ_QUESTIONS.items():
+        options = question["options"]
+        if question.get("multi"):
+            choices = [
+                MULTI_SEPARATOR.join(o for bit, o in enumerate(options) if mask >> bit & 1)
+                for mask in range(1, 1 << len(options))
+            ]
+        else:
+            choices = list(options)
+        table[q_id] = np.array(choices)[rng.integers(len(choices), size=rows)]
+    return table
+
+
+def _row_answers(table: Dict[str, np.ndarray], row: int) -> Dict[str, Any]:
+    answers = {}
+    for q_id, question in QUIZ_QUESTIONS.items():
+        value = str(table[q_id][row])
+        answers[q_id] = value.split(MULTI_SEPARATOR) if question.get("multi") else value
+    return answers
+
+
+def run(rows: int, repeat: int, scalar_rows: int, seed: int) -> Dict[str, Any]:
+    methods = get_catalog().methods
+    table = synthetic_population(rows, seed)
+
+    started = time.perf_counter()
+    code_keys()
+    get_decision_table(methods)
+    setup_ms = (time.perf_counter() - started) * 1000
+
+    pack_s, categorize_s = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        codes = pack_table(table)
+        packed = time.perf_counter()
+        matrix = categorize_codes(codes, methods)
+        pack_s.append(packed - started)
+        categorize_s.append(time.perf_counter() - packed)
+    batch_s = statistics.median(p + c for p, c in zip(pack_s, categorize_s))
+
+    scalar_rows = min(scalar_rows, rows)
+    sample = [_row_answers(table, row) for row in range(scalar_rows)]
+    started = time.perf_counter()
+    scalar = [get_recommendations(methods, encode_answers(answers)) for answers in sample]
+    scalar_s = time.perf_counter() - started
+
+    index = {method.id: i for i, method in enumerate(methods)}
+    mismatches = 0
+    for row, results in enumerate(scalar):
+        expected = np.empty(len(methods), dtype=np.uint8)
+        for category_index, category in enumerate(CATEGORIES):
+            for method in results[category]:
+                expected[index[method.id]] = category_index
+        mismatches += int(not np.array_equal(expected, matrix[row]))
+
+    scalar_rps = scalar_rows / scalar_s if scalar_s else 0.0
+    return {
+        "rows": rows,
+        "methods": len(methods),
+        "setup_ms": round(setup_ms, 1),
+        "pack_ms": round(statistics.median(pack_s) * 1000, 1),
+        "categorize_ms": round(statistics.median(categorize_s) * 1000, 1),
+        "batch_rows_per_second": round(rows / batch_s),
+        "scalar_rows": scalar_rows,
+        "scalar_rows_per_second": round(scalar_rps),
+        "speedup": round(rows / batch_s / scalar_rps, 1) if scalar_rps else None,
+        "mismatches": mismatches,
+        "matrix_bytes": matrix.nbytes,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="respondents in the synthetic population")
+    parser.add_argument("--repeat", type=int, default=3, help="timed batch runs; the median is reported")
+    parser.add_argument("--scalar-rows", type=int, default=20_000, help="rows scored with the scalar path for the baseline and the comparison")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args.rows, args.repeat, args.scalar_rows, args.seed)
+    print(
+        f"{report['rows']:,} rows x {report['methods']} methods: {report['batch_rows_per_second']:,} rows/s batch "
+        f"(pack {report['pack_ms']} ms + categorize {report['categorize_ms']} ms), "
+        f"{report['scalar_rows_per_second']:,} rows/s scalar, {report['speedup']}x",
+        file=sys.stderr,
+    )
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    else:
+        print(json.dumps(report))
+    if report["mismatches"]:
+        print(f"{report['mismatches']} of {report['scalar_rows']} rows differ from the scalar path", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
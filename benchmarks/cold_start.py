@@ -0,0 +1,189 @@
+"""Cold-start profile of the app: import times and per-statement timing of the first run.
+
+Each sample starts a fresh interpreter with ``python -X importtime`` that
+imports Streamlit and then runs streamlit_app.py twice under AppTest (a
+cold and a warm run), timing every top-level statement of the script::
+
+    python -m benchmarks.cold_start
+    python -m benchmarks.cold_start --repeat 5 --output cold.json
+
+Reports the slowest imports and statements of the cold run. Cold start is
+the Streamlit import plus the app's own share of the first run (the sum of
+its top-level statements; AppTest's per-run overhead, reported separately,
+is left out), as the median over --repeat samples. The command exits
+non-zero if cold start exceeds --budget-ms or the app's share exceeds
+--app-budget-ms, so it can gate a deploy the way ``page_bench --baseline``
+does.
+"""
+import argparse
+import ast
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.page_bench import APP_PATH
+
+# Landing page cold start, with headroom for slower replicas. Streamlit's
+# own import is most of it; the app's share was ~20 ms when this was set,
+# plus ~50 ms that Streamlit spends in inspect.stack() on the first element
+# of a process (its "use streamlit run" check, charged to inject_styles()).
+COLD_START_BUDGET_MS = 1000.0
+APP_COLD_START_BUDGET_MS = 120.0
+
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+# Timings of each script run in this (child) process: [(line, statement, ms), ...].
+_RUNS: List[List[Tuple[int, str, float]]] = []
+
+_TIMED_SCRIPT = """
+from benchmarks.cold_start import run_statements
+run_statements({path!r})
+"""
+
+
+def _describe(source: str, node: ast.stmt) -> str:
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return f"{'class' if isinstance(node, ast.ClassDef) else 'def'} {node.name}"
+    text = " ".join((ast.get_source_segment(source, node) or "").split())
+    return text if len(text) <= 70 else text[:67] + "..."
+
+
+def run_statements(path: str) -> None:
+    """Execute the script at path one top-level statement at a time, recording each duration."""
+    source = Path(path).read_text()
+    tree = ast.parse(source, path)
+    namespace: Dict[str, Any] = {"__name__": "__main__", "__file__": path}
+    timings: List[Tuple[int, str, float]] = []
+    _RUNS.append(timings)
+    for node in tree.body:
+        code = compile(ast.Module(body=[node], type_ignores=[]), path, "exec")
+        started = time.perf_counter()
+        try:
+            exec(code, namespace)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            timings.append((node.lineno, _describe(source, node), elapsed_ms))
+
+
+def child(timeout: float) -> int:
+    """One sample, run in a fresh interpreter; prints its measurements as JSON."""
+    started = time.perf_counter()
+    import streamlit  # noqa: F401
+    streamlit_import_ms = (time.perf_counter() - started) * 1000
+
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_string(_TIMED_SCRIPT.format(path=str(APP_PATH)), default_timeout=timeout)
+    run_ms = []
+    for _ in range(2):
+        started = time.perf_counter()
+        at.run()
+        run_ms.append((time.perf_counter() - started) * 1000)
+        if at.exception:
+            raise RuntimeError(f"script raised: {at.exception[0].value}")
+    print(json.dumps({
+        "streamlit_import_ms": streamlit_import_ms,
+        "cold_run_ms": run_ms[0],
+        "warm_run_ms": run_ms[1],
+        "statements": _RUNS,
+    }))
+    return 0
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Top-level imports from -X importtime output, slowest first."""
+    imports = []
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match and not match.group(3):
+            imports.append({"module": match.group(4), "self_ms": int(match.group(1)) / 1000, "cumulative_ms": int(match.group(2)) / 1000})
+    return sorted(imports, key=lambda entry: -entry["cumulative_ms"])
+
+
+def sample(timeout: float) -> Dict[str, Any]:
+    command = [
+        sys.executable, "-X", "importtime", "-c",
+        f"import sys; from benchmarks.cold_start import child; sys.exit(child({timeout!r}))",
+    ]
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=APP_PATH.parent, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"cold start sample failed: {result.stderr[-2000:]}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    cold, warm = report.pop("statements")
+    report["process_wall_ms"] = wall_ms
+    report["app_cold_ms"] = sum(ms for _, _, ms in cold)
+    report["app_warm_ms"] = sum(ms for _, _, ms in warm)
+    report["cold_start_ms"] = report["streamlit_import_ms"] + report["app_cold_ms"]
+    report["statements"] = [
+        {"line": line, "statement": text, "cold_ms": cold_ms, "warm_ms": warm_ms}
+        for (line, text, cold_ms), (_, _, warm_ms) in zip(cold, warm)
+    ]
+    report["imports"] = parse_importtime(result.stderr)
+    return report
+
+
+def format_report(report: Dict[str, Any], top: int) -> str:
+    rows = [
+        f"cold start {report['cold_start_ms']:.0f} ms = streamlit import {report['streamlit_import_ms']:.0f} ms"
+        f" + app statements {report['app_cold_ms']:.1f} ms (warm {report['app_warm_ms']:.1f} ms)",
+        f"AppTest run wall: cold {report['cold_run_ms']:.0f} ms, warm {report['warm_run_ms']:.0f} ms",
+        "",
+        f"{'import':<40} {'cum ms':>8} {'self ms':>8}",
+    ]
+    for entry in report["imports"][:top]:
+        rows.append(f"{entry['module']:<40} {entry['cumulative_ms']:>8.1f} {entry['self_ms']:>8.1f}")
+    rows += ["", f"{'line':>5} {'cold ms':>8} {'warm ms':>8}  statement"]
+    for s in sorted(report["statements"], key=lambda s: -s["cold_ms"])[:top]:
+        rows.append(f"{s['line']:>5} {s['cold_ms']:>8.2f} {s['warm_ms']:>8.2f}  {s['statement']}")
+    return "\n".join(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="fresh-process samples; the median cold start is reported")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-run AppTest timeout in seconds")
+    parser.add_argument("--budget-ms", type=float, default=COLD_START_BUDGET_MS, help="fail if the median cold start exceeds this")
+    parser.add_argument("--app-budget-ms", type=float, default=APP_COLD_START_BUDGET_MS, help="fail if the app's median share of it exceeds this")
+    parser.add_argument("--top", type=int, default=15, help="rows of imports and statements to print")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+    os.environ.setdefault("CC_ANALYTICS", "off")  # benchmark sessions are not visits
+
+    samples = [sample(args.timeout) for _ in range(args.repeat)]
+    cold_start_ms = statistics.median(s["cold_start_ms"] for s in samples)
+    median_sample = min(samples, key=lambda s: abs(s["cold_start_ms"] - cold_start_ms))
+    print(format_report(median_sample, args.top), file=sys.stderr)
+
+    app_cold_ms = statistics.median(s["app_cold_ms"] for s in samples)
+    report = {
+        "cold_start_ms": round(cold_start_ms, 1),
+        "app_cold_ms": round(app_cold_ms, 1),
+        "budget_ms": args.budget_ms,
+        "app_budget_ms": args.app_budget_ms,
+        "samples_ms": [round(s["cold_start_ms"], 1) for s in samples],
+        "median_sample": median_sample,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    else:
+        print(json.dumps({k: v for k, v in report.items() if k != "median_sample"}))
+    failed = False
+    if cold_start_ms > args.budget_ms:
+        print(f"cold start {cold_start_ms:.0f} ms exceeds the {args.budget_ms:.0f} ms budget", file=sys.stderr)
+        failed = True
+    if app_cold_ms > args.app_budget_ms:
+        print(f"app cold start {app_cold_ms:.1f} ms exceeds the {args.app_budget_ms:.0f} ms budget", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
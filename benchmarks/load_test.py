@@ -0,0 +1,418 @@
+"""Concurrent-session load test against a local Streamlit server.
+
+Starts ``streamlit run streamlit_app.py`` on a free port (or targets --url),
+then drives simulated users over the same websocket protocol the browser
+uses: protobuf BackMsg rerun requests in, ForwardMsg deltas out. Each user
+loops through the landing page, the quiz (reloading with ``?start=1`` like
+the Start link), seven answers with think time, results, a card expand and
+collapse, other options and back, one fresh session per loop::
+
+    python -m benchmarks.load_test --concurrency 1,5,10,20 --duration 30
+    python -m benchmarks.load_test --concurrency 50 --duration 60 --think-time 2 --output load.json
+    python -m benchmarks.load_test --max-p95-ms 500   # exit non-zero above this (pre-deploy gate)
+
+Stages run in order at each concurrency level. For every stage it reports
+rerun latency p50/p95/p99 (BackMsg sent until the final script_finished),
+reruns per second, and, from /proc for a locally started server, server CPU
+per active session-second and RSS per active session above the warmed-up
+baseline. The first stage whose p95 exceeds --degrade-factor times the first
+stage's p95 is reported as the point where latency degrades.
+
+The quiz is answered the way the server is configured: through the tile
+component (client tiles and CC_CLIENT_QUIZ=1) or the server-side tile
+buttons (CC_QUIZ_TILES=server). Environment variables are passed through to
+the started server. Requires the ``websockets`` package, which Streamlit
+installs.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+APP_PATH = Path(__file__).resolve().parent.parent / "streamlit_app.py"
+STREAM_PATH = "/_stcore/stream"
+HEALTH_PATH = "/_stcore/health"
+
+# Keep sampling /proc this often while a stage runs.
+SAMPLE_INTERVAL_SECONDS = 0.5
+RERUN_TIMEOUT_SECONDS = 30.0
+
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0..100) of unsorted values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), round(q / 100 * len(ordered) + 0.5)))
+    return ordered[rank - 1]
+
+
+def read_process_stats(pid: int) -> Optional[Tuple[float, int]]:
+    """(CPU seconds, RSS bytes) of a process from /proc, or None where unavailable."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as f:
+            rss_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    # Fields after the command name start at field 3 (state); utime/stime are fields 14/15.
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / _CLK_TCK
+    return cpu_seconds, rss_pages * _PAGE_SIZE
+
+
+class SimulatedUser:
+    """One browser tab: a websocket session that tracks the widgets it was sent."""
+
+    def __init__(self, url: str, think_time: float, rng: random.Random, latencies: List[float], counters: Dict[str, int]):
+        self.url = url
+        self.think_time = think_time
+        self.rng = rng
+        self.latencies = latencies
+        self.counters = counters
+        self.ws = None
+        self.widgets: Dict[str, Tuple[Any, str]] = {}
+
+    async def connect(self, query_string: str = "") -> None:
+        import websockets
+
+        await self.close()
+        self.ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None, compression=None)
+        self.widgets = {}
+        await self.rerun(query_string=query_string)
+
+    async def close(self) -> None:
+        if self.ws is not None:
+            await self.ws.close()
+            self.ws = None
+
+    async def think(self) -> None:
+        if self.think_time > 0:
+            await asyncio.sleep(self.think_time * self.rng.uniform(0.5, 1.5))
+
+    async def rerun(self, widget_states=(), query_string: str = "", fragment_id: str = "") -> None:
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = query_string
+        msg.rerun_script.fragment_id = fragment_id
+        msg.rerun_script.widget_states.widgets.extend(widget_states)
+        started = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        while True:
+            data = await asyncio.wait_for(self.ws.recv(), RERUN_TIMEOUT_SECONDS)
+            self.counters["bytes"] += len(data)
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            kind = forward.WhichOneof("type")
+            if kind == "new_session" and not forward.new_session.fragment_ids_this_run:
+                self.widgets = {}
+            elif kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                self._track(forward.delta)
+            elif kind == "script_finished":
+                if forward.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                if forward.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    self.counters["errors"] += 1
+                break
+        self.latencies.append((time.perf_counter() - started) * 1000)
+        self.counters["reruns"] += 1
+
+    def _track(self, delta) -> None:
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        if kind == "button":
+            self.widgets[element.button.id] = (element.button, delta.fragment_id)
+        elif kind == "component_instance":
+            self.widgets[element.component_instance.id] = (element.component_instance, delta.fragment_id)
+        elif kind == "exception":
+            self.counters["errors"] += 1
+
+    def find(self, key: Optional[str] = None, label: Optional[str] = None, key_prefix: Optional[str] = None):
+        for widget_id, (proto, fragment_id) in self.widgets.items():
+            if key is not None and widget_id.endswith(f"-{key}"):
+                return widget_id, proto, fragment_id
+            if label is not None and getattr(proto, "label", None) == label:
+                return widget_id, proto, fragment_id
+            if key_prefix is not None and f"-{key_prefix}" in widget_id:
+                return widget_id, proto, fragment_id
+        raise LookupError(f"no widget key={key!r} label={label!r} key_prefix={key_prefix!r}")
+
+    async def click(self, **query) -> None:
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        widget_id, _, fragment_id = self.find(**query)
+        state = WidgetState(id=widget_id, trigger_value=True)
+        await self.rerun([state], fragment_id=fragment_id)
+
+    async def component_event(self, value: Dict[str, Any]) -> None:
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        widget_id, _, fragment_id = self.find(key="quiz_tiles")
+        state = WidgetState(id=widget_id, json_value=json.dumps(value))
+        await self.rerun([state], fragment_id=fragment_id)
+
+    async def answer_quiz(self, questions: Dict[str, Dict[str, Any]]) -> None:
+        try:
+            _, component, _ = self.find(key="quiz_tiles")
+        except LookupError:
+            component = None
+        answers = {}
+        for q_id, question in questions.items():
+            options = question["options"]
+            answers[q_id] = [self.rng.choice(options)] if question.get("multi") else self.rng.choice(options)
+        nonce = f"load-{id(self)}-{time.perf_counter_ns()}"
+
+        if component is not None and json.loads(component.json_args).get("mode") == "full":
+            for _ in questions:
+                await self.think()
+            await self.component_event({"action": "submit", "index": len(questions) - 1, "answers": answers, "nonce": nonce})
+            return
+        for index, (q_id, question) in enumerate(questions.items()):
+            await self.think()
+            last = index == len(questions) - 1
+            if component is not None:
+                await self.component_event({
+                    "action": "submit" if last else "next",
+                    "index": index,
+                    "answers": {q_id: answers[q_id]},
+                    "nonce": f"{nonce}-{index}",
+                })
+                continue
+            for option in (answers[q_id] if question.get("multi") else [answers[q_id]]):
+                await self.click(key=f"tile_{q_id}_{question['options'].index(option)}")
+            await self.click(label="Results" if last else "Next →")
+
+    async def session(self, questions: Dict[str, Dict[str, Any]]) -> None:
+        """One visit: landing, quiz, results, details, other options."""
+        await self.connect()
+        await self.think()
+        await self.connect(query_string="start=1")
+        await self.answer_quiz(questions)
+        for step in (
+            dict(key_prefix="best_"),
+            dict(key_prefix="best_"),
+            dict(key="view_other_options_btn"),
+            dict(key_prefix="other_"),
+            dict(label="← Back to Best Matches"),
+        ):
+            await self.think()
+            try:
+                await self.click(**step)
+            except LookupError:
+                # e.g. no best matches for these answers
+                self.counters["skipped_steps"] += 1
+        await self.close()
+
+
+async def run_stage(url: str, concurrency: int, duration: float, think_time: float, seed: int, pid: Optional[int]) -> Dict[str, Any]:
+    from core.schema import QUIZ_QUESTIONS
+
+    latencies: List[float] = []
+    counters = {"reruns": 0, "bytes": 0, "errors": 0, "sessions": 0, "failed_sessions": 0, "skipped_steps": 0}
+    deadline = time.monotonic() + duration
+
+    async def user_loop(n: int) -> None:
+        rng = random.Random(seed * 1000 + n)
+        # Stagger arrivals so the stage does not start with a thundering herd.
+        await asyncio.sleep(rng.uniform(0, min(think_time, duration / 4) if think_time else 0))
+        while time.monotonic() < deadline:
+            user = SimulatedUser(url, think_time, rng, latencies, counters)
+            try:
+                await user.session(QUIZ_QUESTIONS)
+                counters["sessions"] += 1
+            except Exception:
+                counters["failed_sessions"] += 1
+                await user.close()
+
+    samples: List[Tuple[float, float, int]] = []
+
+    async def sampler() -> None:
+        while True:
+            stats = read_process_stats(pid) if pid else None
+            if stats:
+                samples.append((time.monotonic(), *stats))
+            await asyncio.sleep(SAMPLE_INTERVAL_SECONDS)
+
+    sampling = asyncio.ensure_future(sampler())
+    started = time.monotonic()
+    await asyncio.gather(*(user_loop(n) for n in range(concurrency)))
+    elapsed = time.monotonic() - started
+    sampling.cancel()
+    stats = read_process_stats(pid) if pid else None
+    if stats:
+        samples.append((time.monotonic(), *stats))
+
+    result: Dict[str, Any] = {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        **counters,
+        "reruns_per_second": round(counters["reruns"] / elapsed, 2) if elapsed else None,
+        "p50_ms": _round(percentile(latencies, 50)),
+        "p95_ms": _round(percentile(latencies, 95)),
+        "p99_ms": _round(percentile(latencies, 99)),
+        "mean_ms": _round(statistics.fmean(latencies)) if latencies else None,
+    }
+    if len(samples) >= 2:
+        cpu = samples[-1][1] - samples[0][1]
+        wall = samples[-1][0] - samples[0][0]
+        peak_rss = max(s[2] for s in samples)
+        result.update({
+            "server_cpu_percent": round(100 * cpu / wall, 1) if wall else None,
+            "cpu_ms_per_session_second": round(1000 * cpu / (wall * concurrency), 2) if wall else None,
+            "peak_rss_mb": round(peak_rss / 2**20, 1),
+            "rss_start_mb": round(samples[0][2] / 2**20, 1),
+        })
+    return result
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, timeout: float = 60.0) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "streamlit", "run", str(APP_PATH),
+        "--server.headless", "true",
+        "--server.port", str(port),
+        "--server.address", "127.0.0.1",
+        "--server.fileWatcherType", "none",
+        "--browser.gatherUsageStats", "false",
+    ]
+    server = subprocess.Popen(command, cwd=APP_PATH.parent, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"streamlit exited with {server.returncode}: {server.stderr.read().decode()[-2000:]}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}{HEALTH_PATH}", timeout=1) as response:
+                if response.status == 200:
+                    return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"streamlit did not become healthy within {timeout:.0f}s")
+
+
+def degradation_point(stages: List[Dict[str, Any]], factor: float) -> Optional[int]:
+    """Concurrency of the first stage whose p95 exceeds factor x the first stage's p95."""
+    if not stages or stages[0]["p95_ms"] is None:
+        return None
+    baseline = stages[0]["p95_ms"]
+    for stage in stages[1:]:
+        if stage["p95_ms"] is not None and stage["p95_ms"] > baseline * factor:
+            return stage["concurrency"]
+    return None
+
+
+def format_table(stages: List[Dict[str, Any]]) -> str:
+    rows = [f"{'users':>6} {'reruns':>7} {'rr/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'cpu %':>6} {'cpu ms/s/user':>14} {'peak rss MB':>12} {'errors':>7}"]
+    for s in stages:
+        rows.append(
+            f"{s['concurrency']:>6} {s['reruns']:>7} {s['reruns_per_second'] or 0:>7.1f} {s['p50_ms'] or 0:>8.1f} "
+            f"{s['p95_ms'] or 0:>8.1f} {s['p99_ms'] or 0:>8.1f} {s.get('server_cpu_percent') or 0:>6.1f} "
+            f"{s.get('cpu_ms_per_session_second') or 0:>14.2f} {s.get('peak_rss_mb') or 0:>12.1f} "
+            f"{s['errors'] + s['failed_sessions']:>7}"
+        )
+    return "\n".join(rows)
+
+
+async def run_load_test(args) -> Dict[str, Any]:
+    server = None
+    pid = None
+    url = args.url
+    if url is None:
+        port = args.port or _free_port()
+        server = start_server(port)
+        pid = server.pid
+        url = f"ws://127.0.0.1:{port}{STREAM_PATH}"
+    try:
+        # One unmeasured visit first, so imports and process-wide caches are
+        # not counted as per-session memory.
+        from core.schema import QUIZ_QUESTIONS
+
+        warmup = {"reruns": 0, "bytes": 0, "errors": 0, "skipped_steps": 0}
+        await SimulatedUser(url, 0, random.Random(args.seed), [], warmup).session(QUIZ_QUESTIONS)
+        idle = read_process_stats(pid) if pid else None
+        stages = []
+        for concurrency in args.concurrency:
+            stage = await run_stage(url, concurrency, args.duration, args.think_time, args.seed, pid)
+            if idle and "peak_rss_mb" in stage:
+                stage["rss_per_session_kb"] = round((stage["peak_rss_mb"] * 2**20 - idle[1]) / 1024 / concurrency, 1)
+            stages.append(stage)
+            print(format_table(stages).splitlines()[-1], file=sys.stderr)
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    import streamlit
+
+    return {
+        "streamlit_version": streamlit.__version__,
+        "python_version": sys.version.split()[0],
+        "url": url,
+        "duration": args.duration,
+        "think_time": args.think_time,
+        "warm_rss_mb": round(idle[1] / 2**20, 1) if idle else None,
+        "env": {k: v for k, v in os.environ.items() if k.startswith("CC_")},
+        "stages": stages,
+        "degrades_at_concurrency": degradation_point(stages, args.degrade_factor),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=lambda s: [int(n) for n in s.split(",")], default=[1, 5, 10, 20],
+                        help="comma-separated simulated users per stage")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per stage")
+    parser.add_argument("--think-time", type=float, default=1.0, help="mean seconds between user actions (0 for none)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--url", help="websocket URL of an already running app, e.g. ws://host:8501/_stcore/stream (no CPU/RSS)")
+    parser.add_argument("--port", type=int, help="port for the started server (default: a free port)")
+    parser.add_argument("--degrade-factor", type=float, default=2.0, help="p95 growth over the first stage that counts as degraded")
+    parser.add_argument("--max-p95-ms", type=float, help="exit non-zero if any stage's p95 exceeds this")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+    os.environ.setdefault("CC_ANALYTICS", "off")  # benchmark sessions are not visits
+
+    sys.path.insert(0, str(APP_PATH.parent))
+    print(format_table([]), file=sys.stderr)
+    report = asyncio.run(run_load_test(args))
+    if report["degrades_at_concurrency"] is not None:
+        print(f"p95 latency degrades at {report['degrades_at_concurrency']} concurrent users", file=sys.stderr)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    else:
+        print(json.dumps(report, indent=2))
+
+    failed = any(s["failed_sessions"] or s["errors"] for s in report["stages"])
+    if args.max_p95_ms is not None:
+        failed = failed or any(s["p95_ms"] is not None and s["p95_ms"] > args.max_p95_ms for s in report["stages"])
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
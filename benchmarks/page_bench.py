@@ -0,0 +1,279 @@
+"""Headless rerun-latency and payload benchmark for every page of the app.
+
+Drives streamlit_app.py with streamlit.testing.v1.AppTest through the
+landing page, the rerun the stylesheet injector triggers when it reports
+back, each quiz question, results, a method-detail expand, other
+options and the legal page, and reports per step the wall time of the
+rerun, the number of elements emitted and the bytes of markdown/HTML and
+of serialized element protos::
+
+    python -m benchmarks.page_bench --repeat 5 --output bench.json
+    python -m benchmarks.page_bench --baseline bench.json --threshold 1.25
+
+Quiz answers go through the tile component (simulated by setting its
+session-state value) unless CC_QUIZ_TILES=server, in which case every tile
+click and Next press is a separate rerun. With CC_CLIENT_QUIZ=1 the whole
+quiz is a single "quiz_submit" rerun.
+
+Card expand/collapse steps are replayed the way the browser sends them, as
+reruns of the card-list fragment only, so their numbers cover just the
+fragment's elements. The rest of the page is then refreshed, untimed, before
+the next full-page step.
+
+With --baseline, exits non-zero if any step's median wall time or emitted
+bytes exceed the baseline by more than the threshold factor.
+"""
+import argparse
+import functools
+import json
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+APP_PATH = Path(__file__).resolve().parent.parent / "streamlit_app.py"
+
+# Wall time is noisy at sub-millisecond scale; ignore regressions below this.
+MIN_WALL_MS_DELTA = 2.0
+
+# Steps whose widgets live in an st.fragment; the browser reruns only that fragment.
+FRAGMENT_STEPS = frozenset({"method_expand", "method_collapse", "other_option_expand"})
+
+
+def _walk(node) -> Iterator[Any]:
+    yield node
+    for child in getattr(node, "children", {}).values():
+        yield from _walk(child)
+
+
+def measure_page(at) -> Dict[str, int]:
+    elements = markdown_bytes = proto_bytes = 0
+    for node in _walk(at._tree):
+        proto = getattr(node, "proto", None)
+        if proto is None or getattr(node, "children", None):
+            continue
+        elements += 1
+        if hasattr(proto, "ByteSize"):
+            proto_bytes += proto.ByteSize()
+        if getattr(node, "type", None) == "markdown":
+            markdown_bytes += len(node.value.encode())
+    return {"elements": elements, "markdown_bytes": markdown_bytes, "proto_bytes": proto_bytes}
+
+
+def _button(at, label: Optional[str] = None, key_prefix: Optional[str] = None):
+    for button in at.button:
+        if label is not None and button.label == label:
+            return button
+        if key_prefix is not None and button.key and button.key.startswith(key_prefix):
+            return button
+    raise LookupError(f"no button with label={label!r} key_prefix={key_prefix!r}")
+
+
+def _latest_fragment_id(at) -> str:
+    """Id of the most recently registered fragment (the card list on the results pages)."""
+    sequence = at._fragment_storage._registration_sequence_by_id
+    if not sequence:
+        raise LookupError("no fragment registered on this page")
+    return max(sequence, key=sequence.get)
+
+
+@contextmanager
+def _fragment_rerun(fragment_id: str) -> Iterator[None]:
+    """Make AppTest's next run a fragment rerun, as the frontend requests for widgets in a fragment."""
+    from streamlit.testing.v1 import local_script_runner
+
+    original = local_script_runner.RerunData
+    local_script_runner.RerunData = functools.partial(original, fragment_id_queue=[fragment_id])
+    try:
+        yield
+    finally:
+        local_script_runner.RerunData = original
+
+
+def _component_event(q_id: str, index: int, answer: Any, last: bool) -> Callable[[Any], None]:
+    """Simulate the quiz tile component reporting Next/Results for one question."""
+    def action(at):
+        at.session_state[QUIZ_TILES_KEY] = {
+            "action": "submit" if last else "next",
+            "index": index,
+            "answers": {q_id: answer},
+            "nonce": f"bench-{time.perf_counter_ns()}",
+        }
+
+    return action
+
+
+def _confirm_styles(at) -> None:
+    """Report the stylesheet digest back, as the css_injector component does once the page has it."""
+    from ui_components import CSS_INJECTOR_KEY
+
+    for node in _walk(at._tree):
+        proto = getattr(node, "proto", None)
+        if getattr(proto, "component_name", None) == "cc_css_injector":
+            at.session_state[CSS_INJECTOR_KEY] = {"digest": json.loads(proto.json)["digest"]}
+            return
+    raise LookupError("no css_injector on this page")
+
+
+def _benchmark_answer(question: Dict[str, Any]) -> Any:
+    return [question["options"][1]] if question.get("multi") else question["options"][0]
+
+
+def flow_steps(questions: Dict[str, Dict[str, Any]], client_tiles: bool, client_quiz: bool = False) -> List[Tuple[str, Callable[[Any], None]]]:
+    """(step name, action) pairs; each action sets up one rerun that is then timed."""
+    steps: List[Tuple[str, Callable[[Any], None]]] = [("landing", lambda at: None), ("styles_confirmed", _confirm_styles)]
+
+    def start(at):
+        at.query_params["start"] = "1"
+
+    steps.append(("start", start))
+    if client_quiz:
+        def submit(at):
+            at.session_state[QUIZ_TILES_KEY] = {
+                "action": "submit",
+                "index": len(questions) - 1,
+                "answers": {q_id: _benchmark_answer(q) for q_id, q in questions.items()},
+                "nonce": f"bench-{time.perf_counter_ns()}",
+            }
+
+        steps.append(("quiz_submit", submit))
+    for n, (q_id, question) in enumerate(questions.items()):
+        if client_quiz:
+            break
+        option = 1 if question.get("multi") else 0
+        last = n == len(questions) - 1
+        if client_tiles:
+            steps.append((f"{q_id}_next", _component_event(q_id, n, _benchmark_answer(question), last)))
+            continue
+        steps.append((f"{q_id}_select", lambda at, q_id=q_id, option=option: at.button(key=f"tile_{q_id}_{option}").click()))
+        label = "Results" if last else "Next →"
+        steps.append((f"{q_id}_next", lambda at, label=label: _button(at, label=label).click()))
+    steps += [
+        ("method_expand", lambda at: _button(at, key_prefix="best_").click()),
+        ("method_collapse", lambda at: _button(at, key_prefix="best_").click()),
+        ("other_options", lambda at: at.button(key="view_other_options_btn").click()),
+        ("other_option_expand", lambda at: _button(at, key_prefix="other_").click()),
+        ("back_to_results", lambda at: _button(at, label="← Back to Best Matches").click()),
+        ("start_over", lambda at: _button(at, label="Start Over").click()),
+    ]
+
+    def legal(at):
+        at.query_params["legal"] = "1"
+
+    steps.append(("legal", legal))
+    return steps
+
+
+def run_flow(timeout: float) -> Dict[str, Dict[str, float]]:
+    from streamlit.testing.v1 import AppTest
+
+    from core.schema import QUIZ_QUESTIONS
+
+    at = AppTest.from_file(str(APP_PATH), default_timeout=timeout)
+    results = {}
+    partial_tree = False
+    for name, action in flow_steps(QUIZ_QUESTIONS, QUIZ_TILES_MODE == "client", CLIENT_QUIZ):
+        fragment = name in FRAGMENT_STEPS
+        if partial_tree and not fragment:
+            at.run()
+        fragment_id = _latest_fragment_id(at) if fragment else None
+        action(at)
+        started = time.perf_counter()
+        if fragment:
+            with _fragment_rerun(fragment_id):
+                at.run()
+        else:
+            at.run()
+        wall_ms = (time.perf_counter() - started) * 1000
+        partial_tree = fragment
+        if at.exception:
+            raise RuntimeError(f"step {name!r} raised: {at.exception[0].value}")
+        results[name] = {"wall_ms": wall_ms, **measure_page(at)}
+    return results
+
+
+def summarize(runs: List[Dict[str, Dict[str, float]]]) -> Dict[str, Dict[str, float]]:
+    summary = {}
+    for name in runs[0]:
+        walls = [run[name]["wall_ms"] for run in runs]
+        summary[name] = {
+            "wall_ms_median": round(statistics.median(walls), 3),
+            "wall_ms_min": round(min(walls), 3),
+            "wall_ms_max": round(max(walls), 3),
+            "elements": runs[-1][name]["elements"],
+            "markdown_bytes": runs[-1][name]["markdown_bytes"],
+            "proto_bytes": runs[-1][name]["proto_bytes"],
+        }
+    return summary
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    regressions = []
+    for name, step in current["steps"].items():
+        base = baseline.get("steps", {}).get(name)
+        if base is None:
+            continue
+        wall, base_wall = step["wall_ms_median"], base["wall_ms_median"]
+        if wall > base_wall * threshold and wall - base_wall > MIN_WALL_MS_DELTA:
+            regressions.append(f"{name}: wall {base_wall:.1f} -> {wall:.1f} ms")
+        for field in ("markdown_bytes", "proto_bytes"):
+            if step[field] > base[field] * threshold:
+                regressions.append(f"{name}: {field} {base[field]} -> {step[field]}")
+    return regressions
+
+
+def format_table(steps: Dict[str, Dict[str, float]]) -> str:
+    rows = [f"{'step':<22} {'median ms':>10} {'min ms':>8} {'elements':>9} {'md bytes':>10} {'proto bytes':>12}"]
+    for name, s in steps.items():
+        rows.append(
+            f"{name:<22} {s['wall_ms_median']:>10.2f} {s['wall_ms_min']:>8.2f} {s['elements']:>9} "
+            f"{s['markdown_bytes']:>10} {s['proto_bytes']:>12}"
+        )
+    return "\n".join(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="full flows to run; medians are reported")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-rerun AppTest timeout in seconds")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="allowed regression factor against the baseline")
+    args = parser.parse_args(argv)
+    os.environ.setdefault("CC_ANALYTICS", "off")  # benchmark sessions are not visits
+
+    sys.path.insert(0, str(APP_PATH.parent))
+    global CLIENT_QUIZ, QUIZ_TILES_KEY, QUIZ_TILES_MODE
+    from ui_components import CLIENT_QUIZ, QUIZ_TILES_KEY, QUIZ_TILES_MODE
+
+    runs = [run_flow(args.timeout) for _ in range(args.repeat)]
+
+    import streamlit
+
+    report = {
+        "streamlit_version": streamlit.__version__,
+        "python_version": sys.version.split()[0],
+        "repeat": args.repeat,
+        "quiz_tiles_mode": QUIZ_TILES_MODE,
+        "client_quiz": CLIENT_QUIZ,
+        "steps": summarize(runs),
+    }
+    print(format_table(report["steps"]), file=sys.stderr)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text()), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
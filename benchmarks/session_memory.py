@@ -0,0 +1,122 @@
+"""Per-session memory of the app's session state at every step of the flow.
+
+Drives streamlit_app.py with AppTest through the same steps as
+benchmarks.page_bench and, after each rerun, measures the bytes reachable
+from the session's state that are not shared with the rest of the process
+(objects reachable from the app's modules, such as the method catalog or the
+process-wide recommendation cache, are excluded)::
+
+    python -m benchmarks.session_memory
+    python -m benchmarks.session_memory --output memory.json
+
+Reports the total per step, split into user keys (st.session_state.<key>)
+and Streamlit's own widget bookkeeping, plus the largest user keys.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import types
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from benchmarks.page_bench import APP_PATH, flow_steps
+
+# Traversal stops at these; they are code, not per-session data.
+_OPAQUE_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType, types.CodeType)
+SHARED_MODULE_PREFIXES = ("core.", "ui_components", "streamlit")
+
+
+def _reachable(roots: Iterable[Any], stop: Set[int]) -> Dict[int, Any]:
+    found: Dict[int, Any] = {}
+    stack = list(roots)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in stop or id(obj) in found or isinstance(obj, _OPAQUE_TYPES):
+            continue
+        found[id(obj)] = obj
+        stack.extend(gc.get_referents(obj))
+    return found
+
+
+def shared_object_ids() -> Set[int]:
+    """Ids of objects reachable from the globals of the app's and Streamlit's modules."""
+    roots = [
+        vars(module) for name, module in list(sys.modules.items())
+        if module is not None and name.startswith(SHARED_MODULE_PREFIXES)
+    ]
+    return set(_reachable(roots, set()))
+
+
+def deep_size(obj: Any, shared: Set[int]) -> int:
+    """Bytes of every object reachable from obj that is not in shared, each counted once."""
+    return sum(sys.getsizeof(o) for o in _reachable([obj], shared).values())
+
+
+def measure_session(at, shared: Set[int]) -> Dict[str, Any]:
+    state = at.session_state
+    state = getattr(state, "_state", state)
+    user = {key: deep_size(state[key], shared) for key in state.filtered_state}
+    return {
+        "total_bytes": deep_size(state, shared),
+        "user_bytes": sum(user.values()),
+        "user_keys": len(user),
+        "largest": dict(sorted(user.items(), key=lambda kv: -kv[1])[:5]),
+    }
+
+
+def run(timeout: float) -> Dict[str, Dict[str, Any]]:
+    from streamlit.testing.v1 import AppTest
+
+    from core.schema import QUIZ_QUESTIONS
+    import benchmarks.page_bench as page_bench
+    from ui_components import CLIENT_QUIZ, QUIZ_TILES_KEY, QUIZ_TILES_MODE
+
+    # page_bench's component events read this global, which its main() sets.
+    page_bench.QUIZ_TILES_KEY = QUIZ_TILES_KEY
+
+    at = AppTest.from_file(str(APP_PATH), default_timeout=timeout)
+    results = {}
+    for name, action in flow_steps(QUIZ_QUESTIONS, QUIZ_TILES_MODE == "client", CLIENT_QUIZ):
+        action(at)
+        at.run()
+        if at.exception:
+            raise RuntimeError(f"step {name!r} raised: {at.exception[0].value}")
+        # Recomputed every step: caches such as the recommendation cache grow as the flow runs.
+        results[name] = measure_session(at, shared_object_ids())
+    return results
+
+
+def format_table(steps: Dict[str, Dict[str, Any]]) -> str:
+    rows = [f"{'step':<22} {'total B':>9} {'user B':>8} {'keys':>5}  largest user keys"]
+    for name, s in steps.items():
+        largest = ", ".join(f"{k}={v}" for k, v in s["largest"].items())
+        rows.append(f"{name:<22} {s['total_bytes']:>9} {s['user_bytes']:>8} {s['user_keys']:>5}  {largest}")
+    return "\n".join(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-rerun AppTest timeout in seconds")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+    os.environ.setdefault("CC_ANALYTICS", "off")  # benchmark sessions are not visits
+
+    sys.path.insert(0, str(APP_PATH.parent))
+    steps = run(args.timeout)
+    print(format_table(steps), file=sys.stderr)
+    report = {
+        "peak_total_bytes": max(s["total_bytes"] for s in steps.values()),
+        "peak_user_bytes": max(s["user_bytes"] for s in steps.values()),
+        "steps": steps,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    else:
+        print(json.dumps({k: v for k, v in report.items() if k != "steps"}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
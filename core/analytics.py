@@ -1,26 +1,181 @@
-import streamlit as st
-import streamlit.components.v1 as components
+"""First-party funnel analytics: anonymous daily event counts in a local SQLite file.
 
-def inject_google_analytics():
-    if st.session_state.get("_ga_loaded"):
+``track(event, detail)`` appends the event to an in-memory buffer. Appending
+to a ``deque`` is atomic, so a rerun never takes a lock or touches the disk.
+A daemon thread, started on the first event, flushes the buffer every
+``CC_ANALYTICS_FLUSH_SECONDS`` (default 10), and once more at exit. It folds
+the buffer into per-(day, event, detail) counts and adds them to
+``funnel_counts`` in ``CC_ANALYTICS_DB`` (default ``data/analytics.sqlite3``).
+Only those aggregates are stored: no session ids, timestamps finer than a
+day, answers or client details. That keeps the landing page's "None of your
+data is stored" promise. Replicas may share the file; the counts are
+additive.
+
+Events (``detail`` in parentheses):
+  landing           the landing page was shown
+  started           Start quiz
+  question_answered a question was answered for the first time in this
+                    attempt (its number, 1-7)
+  results_shown     the results page was reached
+  method_expanded   a method's details were opened (method id)
+  telehealth_click  "Talk to a clinician" (the page it was clicked on);
+                    reported by the browser, see track_beacon()
+
+``CC_ANALYTICS=off`` makes ``track()`` a no-op; the benchmarks set it so
+their sessions are not counted. If the buffer fills between flushes
+(``BUFFER_SIZE`` events), the oldest events are dropped. Counts that cannot
+be written are kept and retried on the next flush. Print the funnel with::
+
+    python -m core.analytics
+    python -m core.analytics --days 7
+"""
+import argparse
+import atexit
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import closing
+from pathlib import Path
+from typing import Deque, List, Optional, Tuple
+
+from core.asset_cache import APP_ROOT
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_ENABLED = os.environ.get("CC_ANALYTICS", "on").strip().lower() not in ("0", "false", "no", "off")
+ANALYTICS_DB = Path(os.environ.get("CC_ANALYTICS_DB") or APP_ROOT / "data" / "analytics.sqlite3")
+FLUSH_SECONDS = float(os.environ.get("CC_ANALYTICS_FLUSH_SECONDS", "10"))
+BUFFER_SIZE = 100_000
+
+EVENTS = ("landing", "started", "question_answered", "results_shown", "method_expanded", "telehealth_click")
+_EVENT_SET = frozenset(EVENTS)
+# Events the browser reports itself, with the details it may send.
+BEACON_EVENTS = {"telehealth_click": ("landing", "results")}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS funnel_counts (
+    day    TEXT NOT NULL,
+    event  TEXT NOT NULL,
+    detail TEXT NOT NULL,
+    count  INTEGER NOT NULL,
+    PRIMARY KEY (day, event, detail)
+)
+"""
+_UPSERT = """
+INSERT INTO funnel_counts (day, event, detail, count) VALUES (?, ?, ?, ?)
+ON CONFLICT (day, event, detail) DO UPDATE SET count = count + excluded.count
+"""
+
+# (UTC day, event, detail) per event, appended by any thread, drained by flush().
+_buffer: Deque[Tuple[str, str, str]] = deque(maxlen=BUFFER_SIZE)
+# Drained counts not yet written; only touched under _flush_lock.
+_pending: Counter = Counter()
+_flush_lock = threading.Lock()
+_start_lock = threading.Lock()
+_flusher: Optional[threading.Thread] = None
+
+
+def track(event: str, detail: str = "") -> None:
+    """Count one funnel event; cheap enough for any rerun or callback."""
+    if not ANALYTICS_ENABLED:
         return
-    st.session_state["_ga_loaded"] = True
-
-    components.html(
-        """
-        <!-- Google tag (gtag.js) -->
-        <script async src="https://www.googletagmanager.com/gtag/js?id=G-S3RTFPRMLX"></script>
-        <script>
-          window.dataLayer = window.dataLayer || [];
-          function gtag(){dataLayer.push(arguments);}
-          gtag('js', new Date());
-
-          gtag('config', 'G-S3RTFPRMLX', {
-            'anonymize_ip': true,
-            'allow_google_signals': false,
-            'allow_ad_personalization_signals': false
-          });
-        </script>
-        """,
-        height=0,
-    )
+    if event not in _EVENT_SET:
+        raise ValueError(f"unknown analytics event {event!r}; expected one of {', '.join(EVENTS)}")
+    _buffer.append((time.strftime("%Y-%m-%d", time.gmtime()), event, str(detail)))
+    if _flusher is None:
+        _start_flusher()
+
+
+def track_beacon(event: str, detail: str) -> bool:
+    """Count an event the browser reported (core/metrics.py serves /track); False, and nothing counted, unless BEACON_EVENTS allows it."""
+    if detail not in BEACON_EVENTS.get(event, ()):
+        return False
+    track(event, detail)
+    return True
+
+
+def _start_flusher() -> None:
+    global _flusher
+    with _start_lock:
+        if _flusher is not None:
+            return
+        _flusher = threading.Thread(target=_flush_loop, name="cc-analytics-flush", daemon=True)
+        _flusher.start()
+        atexit.register(flush)
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(FLUSH_SECONDS)
+        flush()
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(_SCHEMA)
+    return conn
+
+
+def flush(path: Optional[Path] = None) -> int:
+    """Add buffered events to the database as daily counts; returns the number of events written."""
+    with _flush_lock:
+        pop = _buffer.popleft
+        try:
+            while True:
+                _pending[pop()] += 1
+        except IndexError:
+            pass
+        if not _pending:
+            return 0
+        try:
+            with closing(_connect(path or ANALYTICS_DB)) as conn, conn:
+                conn.executemany(_UPSERT, [(*key, count) for key, count in _pending.items()])
+        except (sqlite3.Error, OSError) as exc:
+            logger.warning("Could not write analytics to %s; retrying on the next flush: %s", path or ANALYTICS_DB, exc)
+            return 0
+        written = sum(_pending.values())
+        _pending.clear()
+        return written
+
+
+def funnel(path: Optional[Path] = None, since: Optional[str] = None) -> List[Tuple[str, str, int]]:
+    """(event, detail, count) totals from day ``since`` (YYYY-MM-DD) on, in funnel order."""
+    path = path or ANALYTICS_DB
+    if not path.exists():
+        return []
+    with closing(_connect(path)) as conn:
+        rows = conn.execute(
+            "SELECT event, detail, SUM(count) FROM funnel_counts WHERE day >= ? GROUP BY event, detail",
+            (since or "",),
+        ).fetchall()
+    order = {event: i for i, event in enumerate(EVENTS)}
+    return sorted(rows, key=lambda r: (order.get(r[0], len(order)), int(r[1]) if r[1].isdigit() else 0, r[1]))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=30, help="days to include, counting today (0 for all)")
+    parser.add_argument("--db", type=Path, default=ANALYTICS_DB, help="analytics database")
+    args = parser.parse_args(argv)
+
+    since = time.strftime("%Y-%m-%d", time.gmtime(time.time() - (args.days - 1) * 86400)) if args.days > 0 else None
+    rows = funnel(args.db, since)
+    if not rows:
+        print(f"{args.db}: no events" + (f" since {since}" if since else ""), file=sys.stderr)
+        return 0
+    started = sum(count for event, _, count in rows if event == "started")
+    print(f"{'event':<20} {'detail':<20} {'count':>9} {'of started':>10}")
+    for event, detail, count in rows:
+        share = f"{count / started:.0%}" if started and event != "landing" else ""
+        print(f"{event:<20} {detail:<20} {count:>9,} {share:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple, Union
+
+APP_ROOT = Path(__file__).resolve().parent.parent
+
+# Hero + 12 thumbnails + 12 full images base64-encode to roughly 3 MB.
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+
+class CachedAsset(NamedTuple):
+    stamp: Tuple[int, int]
+    digest: str
+    base64: str
+
+
+class AssetCache:
+    """Process-wide, thread-safe LRU of base64-encoded asset files.
+
+    Entries are keyed by resolved path and revalidated against the file's
+    mtime and size on every lookup, so an edited asset is re-read on the
+    next request. Total cached base64 size is bounded by ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CachedAsset]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: Union[str, Path]) -> Optional[CachedAsset]:
+        full_path = resolve_asset_path(path)
+        key = str(full_path)
+        try:
+            stat = full_path.stat()
+        except OSError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.stamp == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        try:
+            data = full_path.read_bytes()
+        except OSError:
+            return None
+        entry = CachedAsset(
+            stamp=stamp,
+            digest=hashlib.sha256(data).hexdigest(),
+            base64=base64.b64encode(data).decode(),
+        )
+
+        with self._lock:
+            self.misses += 1
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.base64)
+            if len(entry.base64) <= self.max_bytes:
+                self._entries[key] = entry
+                self._bytes += len(entry.base64)
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted.base64)
+                    self.evictions += 1
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+def resolve_asset_path(path: Union[str, Path]) -> Path:
+    path = Path(path)
+    if not path.is_absolute():
+        path = APP_ROOT / path
+    return path
+
+
+ASSET_CACHE = AssetCache()
+
+
+def get_asset_base64(path: Union[str, Path]) -> Optional[str]:
+    entry = ASSET_CACHE.get(path)
+    return entry.base64 if entry is not None else None
+
+
+def asset_cache_stats() -> Dict[str, int]:
+    return ASSET_CACHE.stats()
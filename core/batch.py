@@ -0,0 +1,234 @@
+"""Vectorized recommendation categories for many respondents at once.
+
+For research and QA runs over survey exports or synthetic populations.
+``categorize_table()`` takes a columnar table of answers: a mapping of
+question id (``q1`` .. ``q7``) to equal-length columns, such as a dict of
+NumPy arrays or lists, or a pandas DataFrame. It returns a respondents x
+methods matrix of indexes into ``CATEGORIES``::
+
+    from core.batch import categorize_table
+    from core.decision_table import CATEGORIES
+
+    matrix = categorize_table({"q2": smoking, "q6": conditions, "q7": priorities})
+    CATEGORIES[matrix[0, 3]]   # respondent 0, get_catalog().methods[3]
+
+Cells hold the quiz's option strings. Missing columns, None, NaN and ""
+mean unanswered, as in the app. A multi-select cell (q6) is a list of
+options or one string of options joined by ``MULTI_SEPARATOR``. A value
+that is not an option, or a cell of any other type (a number, a dict, a
+nested list), raises ValueError naming the question;
+``pack_table_rows()`` reports such rows instead.
+
+Each column is reduced to its distinct values: string arrays by one
+vectorized comparison per option, other columns in one pass. Each distinct
+value is packed with ``pack_answers()``, which turns every row into an
+answer code. Codes are mapped to decision-table keys and then to category
+rows by array indexing. The code -> key array is built once per process
+from ``encode_answers()``, so results match ``get_recommendations()``
+exactly (checked by ``python -m core.verify``). Benchmark with::
+
+    python -m benchmarks.batch_bench
+"""
+import math
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.decision_table import CATEGORY_BITS, encode_key, get_decision_table
+from core.methods_data import Method, get_catalog
+from core.schema import QUIZ_QUESTIONS, answer_code_space, encode_answers, pack_answers, unpack_answers
+
+MULTI_SEPARATOR = ";"
+
+_code_keys_lock = threading.Lock()
+_code_keys: Optional[np.ndarray] = None
+
+
+def code_keys() -> np.ndarray:
+    """Decision-table key of every pack_answers() code (index = code), built on first use."""
+    global _code_keys
+    if _code_keys is None:
+        with _code_keys_lock:
+            if _code_keys is None:
+                size = answer_code_space()
+                _code_keys = np.fromiter(
+                    (encode_key(encode_answers(unpack_answers(code))) for code in range(size)),
+                    dtype=np.uint16,
+                    count=size,
+                )
+    return _code_keys
+
+
+_LIST_TYPES = (list, tuple, set, frozenset, np.ndarray)
+
+
+def _cell_value(q_id: str, value: Any) -> Any:
+    """A cell as None, a string or (multi-select) a frozenset of strings; ValueError for other types."""
+    if isinstance(value, str):
+        return value or None
+    if isinstance(value, _LIST_TYPES) and QUIZ_QUESTIONS[q_id].get("multi"):
+        if all(isinstance(option, str) for option in value):
+            return frozenset(value)
+    elif value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    expected = "an option string or a list of them" if QUIZ_QUESTIONS[q_id].get("multi") else "an option string"
+    raise ValueError(f"{q_id}: {value!r} is not {expected}")
+
+
+def _factorize(q_id: str, column: Any) -> Tuple[List[Any], np.ndarray]:
+    """(distinct values, index of each row's value) for one column; a cell _cell_value() rejects is its ValueError."""
+    factorize = getattr(column, "factorize", None)
+    if factorize is not None:
+        try:
+            # pandas Series: missing values get -1, mapped to a trailing None.
+            inverse, uniques = factorize()
+            return [*uniques, None], np.where(inverse < 0, len(uniques), inverse)
+        except TypeError:
+            column = column.tolist()  # unhashable cells (lists)
+    index: Dict[Any, int] = {}
+    # Rejected cells become one ValueError per distinct message, raised by _packed_value().
+    rejected: Dict[str, int] = {}
+    uniques: List[Any] = []
+    inverse = np.empty(len(column), dtype=np.intp)
+    for row, value in enumerate(column):
+        try:
+            key = value = _cell_value(q_id, value)
+            positions = index
+        except ValueError as exc:
+            value, key, positions = exc, str(exc), rejected
+        position = positions.get(key)
+        if position is None:
+            position = positions[key] = len(uniques)
+            uniques.append(value)
+        inverse[row] = position
+    return uniques, inverse
+
+
+def _packed_value(q_id: str, value: Any) -> int:
+    """pack_answers() of an answers dict holding only this question's value."""
+    if isinstance(value, ValueError):
+        raise value
+    question = QUIZ_QUESTIONS[q_id]
+    value = _cell_value(q_id, value)
+    if value is None:
+        return 0
+    if question.get("multi"):
+        if isinstance(value, str):
+            value = [option.strip() for option in value.split(MULTI_SEPARATOR) if option.strip()]
+        value = list(value)
+    code = pack_answers({q_id: value})
+    if code is None:
+        raise ValueError(f"{q_id}: {value!r} is not one of {question['options']}")
+    return code
+
+
+def _option_strings(q_id: str) -> List[Tuple[str, int]]:
+    """(cell text, packed value) for each option, or each option subset in option order for multi-select."""
+    question = QUIZ_QUESTIONS[q_id]
+    options = question["options"]
+    if not question.get("multi"):
+        return [(option, _packed_value(q_id, option)) for option in options]
+    subsets = ([o for bit, o in enumerate(options) if mask >> bit & 1] for mask in range(1, 1 << len(options)))
+    return [(MULTI_SEPARATOR.join(subset), _packed_value(q_id, subset)) for subset in subsets]
+
+
+def _pack_uniques(
+    q_id: str,
+    uniques: Sequence[Any],
+    inverse: np.ndarray,
+    rows: Optional[np.ndarray],
+    errors: Optional[Dict[int, str]],
+) -> np.ndarray:
+    """Packed value of each distinct value; each invalid one raises, or packs as 0 with its rows added to ``errors``.
+
+    ``inverse`` indexes ``uniques`` for each of ``rows`` (default: every row).
+    """
+    values = np.zeros(len(uniques), dtype=np.int64)
+    invalid: Dict[int, str] = {}
+    for position, value in enumerate(uniques):
+        try:
+            values[position] = _packed_value(q_id, value)
+        except ValueError as exc:
+            if errors is None:
+                raise
+            invalid[position] = str(exc)
+    if invalid:
+        bad = np.flatnonzero(np.isin(inverse, list(invalid)))
+        for row, position in zip((bad if rows is None else rows[bad]).tolist(), inverse[bad].tolist()):
+            errors.setdefault(row, invalid[position])
+    return values
+
+
+def _pack_column(q_id: str, column: Any, errors: Optional[Dict[int, str]] = None) -> np.ndarray:
+    if isinstance(column, np.ndarray) and column.dtype.kind in "UST":
+        # String arrays: one vectorized comparison per expected cell text;
+        # only the rows matching none of them are factorized.
+        packed = np.zeros(len(column), dtype=np.int64)
+        matched = column == ""
+        for text, value in _option_strings(q_id):
+            hit = column == text
+            packed[hit] = value
+            matched |= hit
+        rest = np.flatnonzero(~matched)
+        if rest.size:
+            uniques, inverse = np.unique(column[rest], return_inverse=True)
+            inverse = inverse.reshape(-1)
+            packed[rest] = _pack_uniques(q_id, uniques.tolist(), inverse, rest, errors)[inverse]
+        return packed
+    uniques, inverse = _factorize(q_id, column)
+    return _pack_uniques(q_id, uniques, inverse, None, errors)[inverse]
+
+
+def pack_table(table: Mapping[str, Any]) -> np.ndarray:
+    """pack_answers() code of every row of a columnar answers table, as int64."""
+    return _pack_table(table, None)
+
+
+def pack_table_rows(table: Mapping[str, Any]) -> Tuple[np.ndarray, Dict[int, str]]:
+    """pack_table() that reports invalid cells instead of raising: (codes, {row: error}).
+
+    Each column's distinct values are checked once. An invalid cell packs as
+    unanswered, and its row's error is its first invalid cell in question order.
+    """
+    errors: Dict[int, str] = {}
+    return _pack_table(table, errors), errors
+
+
+def _pack_table(table: Mapping[str, Any], errors: Optional[Dict[int, str]]) -> np.ndarray:
+    rows = None
+    codes = None
+    for q_id in QUIZ_QUESTIONS:
+        if q_id not in table:
+            continue
+        column = table[q_id]
+        if rows is None:
+            rows = len(column)
+            codes = np.zeros(rows, dtype=np.int64)
+        elif len(column) != rows:
+            raise ValueError(f"{q_id}: column has {len(column)} rows, expected {rows}")
+        codes += _pack_column(q_id, column, errors)
+    if codes is None:
+        raise ValueError(f"table has none of the question columns {list(QUIZ_QUESTIONS)}")
+    return codes
+
+
+def categorize_codes(codes: np.ndarray, methods: Optional[Sequence[Method]] = None) -> np.ndarray:
+    """respondents x methods matrix (uint8 indexes into CATEGORIES) for pack_answers() codes."""
+    if methods is None:
+        methods = get_catalog().methods
+    codes = np.asarray(codes)
+    if codes.size and (codes.min() < 0 or codes.max() >= answer_code_space()):
+        raise ValueError("codes must come from pack_answers()")
+    table = get_decision_table(methods)
+    words = np.frombuffer(table.codes, dtype=np.uint64)
+    shifts = np.arange(len(methods), dtype=np.uint64) * np.uint64(CATEGORY_BITS)
+    mask = np.uint64((1 << CATEGORY_BITS) - 1)
+    # One row of categories per decision-table key, then one gather per respondent.
+    key_rows = ((words[:, None] >> shifts) & mask).astype(np.uint8)
+    return key_rows[code_keys()[codes]]
+
+
+def categorize_table(table: Mapping[str, Any], methods: Optional[Sequence[Method]] = None) -> np.ndarray:
+    """respondents x methods matrix (uint8 indexes into CATEGORIES) for a columnar answers table."""
+    return categorize_codes(pack_table(table), methods)
@@ -0,0 +1,206 @@
+"""Chunked bulk scoring of quiz answers in CSV or JSONL, shared by main.py and core/verify.py.
+
+``score_csv_chunk()`` and ``score_jsonl_chunk()`` score one chunk of rows
+with core.batch and return the output text, so chunks can go to worker
+processes. ``score_stream()`` reads a whole input in chunks, scores them
+inline or in a process pool, and writes results in input order with at most
+CHUNKS_IN_FLIGHT_PER_WORKER chunks per worker in flight. The row formats are
+described in main.py.
+"""
+import csv
+import io
+import json
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Any, Deque, Dict, Iterator, List, Optional, TextIO, Tuple
+
+import numpy as np
+
+from core.batch import categorize_codes, categorize_table, code_keys, pack_table_rows
+from core.decision_table import CATEGORIES, CATEGORY_BITS
+from core.methods_data import get_catalog
+from core.schema import QUIZ_QUESTIONS
+
+FORMATS = ("csv", "jsonl")
+DEFAULT_CHUNK_SIZE = 10_000
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+
+def _warm_worker() -> None:
+    """Build the per-process lookup tables once, before the first chunk."""
+    categorize_table({"q7": [None]})
+
+
+def _score_rows(columns: Dict[str, Any], rows: int) -> Tuple[np.ndarray, List[str]]:
+    """(category matrix, per-row error); invalid values are found once per column and only their rows fail."""
+    codes, invalid = pack_table_rows(columns)
+    errors = [""] * rows
+    for row, error in invalid.items():
+        errors[row] = error
+    return categorize_codes(codes, get_catalog().methods), errors
+
+
+def score_csv_chunk(header: List[str], records: List[List[str]]) -> Tuple[str, int, int]:
+    """Score parsed CSV records; returns (output CSV text, rows, rows with errors)."""
+    methods = get_catalog().methods
+    width = len(header)
+    if any(len(record) != width for record in records):
+        records = [(record + [""] * width)[:width] for record in records]
+    fields = list(zip(*records)) if records else [()] * width
+    columns = {name: np.array(fields[i]) for i, name in enumerate(header) if name in QUIZ_QUESTIONS}
+    copied = [fields[i] for i, name in enumerate(header) if name not in QUIZ_QUESTIONS]
+    matrix, errors = _score_rows(columns, len(records))
+    # Few distinct category rows occur; build each one's cells once.
+    row_ids = (matrix.astype(np.uint64) << (np.arange(len(methods), dtype=np.uint64) * np.uint64(CATEGORY_BITS))).sum(axis=1)
+    _, first, inverse = np.unique(row_ids, return_index=True, return_inverse=True)
+    cells = [[CATEGORIES[c] for c in matrix[row]] for row in first]
+    unscored = [""] * len(methods)
+    out = io.StringIO()
+    csv.writer(out, lineterminator="\n").writerows(
+        [*values, *(unscored if error else cells[i]), error]
+        for values, i, error in zip(zip(*copied) if copied else [()] * len(records), inverse.reshape(-1), errors)
+    )
+    return out.getvalue(), len(records), sum(1 for e in errors if e)
+
+
+def score_jsonl_chunk(lines: List[str]) -> Tuple[str, int, int]:
+    """Score JSONL lines; returns (output JSONL text, rows, rows with errors)."""
+    methods = get_catalog().methods
+    records: List[Optional[Dict[str, Any]]] = []
+    errors = [""] * len(lines)
+    for row, line in enumerate(lines):
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            record, errors[row] = None, f"invalid JSON: {exc}"
+        else:
+            if not isinstance(record, dict):
+                record, errors[row] = None, "line is not a JSON object"
+        records.append(record)
+    columns = {q_id: [r.get(q_id) if r is not None else None for r in records] for q_id in QUIZ_QUESTIONS}
+    matrix, score_errors = _score_rows(columns, len(records))
+    errors = [error or score_error for error, score_error in zip(errors, score_errors)]
+    out = io.StringIO()
+    for row, record in enumerate(records):
+        result = {k: v for k, v in (record or {}).items() if k not in QUIZ_QUESTIONS}
+        if errors[row]:
+            result["error"] = errors[row]
+        else:
+            result["categories"] = {m.id: CATEGORIES[c] for m, c in zip(methods, matrix[row])}
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+    return out.getvalue(), len(lines), sum(1 for e in errors if e)
+
+
+def _csv_chunks(source: TextIO, chunk_size: int) -> Tuple[List[str], Iterator[List[List[str]]]]:
+    reader = csv.reader(source)
+    header = next(reader, [])
+
+    def chunks() -> Iterator[List[List[str]]]:
+        chunk = []
+        for record in reader:
+            if not record:
+                continue
+            chunk.append(record)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    return header, chunks()
+
+
+def _jsonl_chunks(source: TextIO, chunk_size: int) -> Iterator[List[str]]:
+    chunk = []
+    for line in source:
+        if line.strip():
+            chunk.append(line)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+class _InlineExecutor(Executor):
+    """Runs submitted calls immediately; --workers 1 scores in this process."""
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future: Future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+class Progress:
+    def __init__(self, stream: TextIO, interval: float, enabled: bool):
+        self.stream = stream
+        self.interval = interval
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.rows = 0
+        self.errors = 0
+        self.chunks = 0
+
+    def add(self, rows: int, errors: int) -> None:
+        self.rows += rows
+        self.errors += errors
+        self.chunks += 1
+        now = time.perf_counter()
+        if self.enabled and now - self._last >= self.interval:
+            self._last = now
+            rate = self.rows / (now - self.started)
+            end = "\r" if self.stream.isatty() else "\n"
+            print(f"{self.rows:,} rows, {self.errors:,} errors, {rate:,.0f} rows/s", end=end, file=self.stream, flush=True)
+
+    def summary(self, workers: int) -> Dict[str, Any]:
+        seconds = time.perf_counter() - self.started
+        if self.enabled and self.stream.isatty():
+            print(file=self.stream)
+        return {
+            "rows": self.rows,
+            "errors": self.errors,
+            "chunks": self.chunks,
+            "workers": workers,
+            "seconds": round(seconds, 2),
+            "rows_per_second": round(self.rows / seconds) if seconds else None,
+        }
+
+
+def score_stream(
+    source: TextIO,
+    sink: TextIO,
+    fmt: str,
+    workers: int,
+    chunk_size: int,
+    progress: Progress,
+) -> None:
+    if fmt == "csv":
+        header, chunks = _csv_chunks(source, chunk_size)
+        if not any(name in QUIZ_QUESTIONS for name in header):
+            raise ValueError(f"the CSV header has none of the question columns {', '.join(QUIZ_QUESTIONS)}")
+        copied = [name for name in header if name not in QUIZ_QUESTIONS]
+        csv.writer(sink, lineterminator="\n").writerow(copied + [m.id for m in get_catalog().methods] + ["error"])
+        jobs = ((score_csv_chunk, header, chunk) for chunk in chunks)
+    else:
+        jobs = ((score_jsonl_chunk, chunk) for chunk in _jsonl_chunks(source, chunk_size))
+
+    if workers > 1:
+        executor: Executor = ProcessPoolExecutor(workers, initializer=_warm_worker)
+    else:
+        code_keys()
+        executor = _InlineExecutor()
+    with executor:
+        pending: Deque[Future] = deque()
+        for fn, *args in jobs:
+            pending.append(executor.submit(fn, *args))
+            # Bounded in-flight work keeps memory flat; results are written in input order.
+            while len(pending) >= workers * CHUNKS_IN_FLIGHT_PER_WORKER or pending and pending[0].done():
+                text, rows, errors = pending.popleft().result()
+                sink.write(text)
+                progress.add(rows, errors)
+        while pending:
+            text, rows, errors = pending.popleft().result()
+            sink.write(text)
+            progress.add(rows, errors)
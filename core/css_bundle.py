@@ -0,0 +1,128 @@
+"""Build the app stylesheet once per process as a minified, content-hashed bundle.
+
+``styles.css`` and the shared rules under ``css/`` are merged into one
+bundle that each session injects once (see ``inject_styles()`` in
+streamlit_app.py). Page-level rules that restyle Streamlit's own containers
+(``css/*_page.css``) cannot be scoped by class, so they stay separate and
+are emitted only on their page. Print a size report with::
+
+    python -m core.css_bundle
+"""
+import hashlib
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from core.asset_cache import APP_ROOT
+
+# "once" injects the bundle into the page until the browser confirms it, then
+# no more for the session; "inline" re-emits it as a <style> on every rerun.
+CSS_MODE = os.environ.get("CC_CSS_MODE", "once").strip().lower()
+
+CSS_DIR = APP_ROOT / "css"
+BUNDLE_SOURCES = (
+    APP_ROOT / "styles.css",
+    CSS_DIR / "app.css",
+    CSS_DIR / "landing.css",
+    CSS_DIR / "results.css",
+)
+PAGE_SOURCES = {
+    "landing": CSS_DIR / "landing_page.css",
+    "quiz": CSS_DIR / "quiz_page.css",
+}
+HERO_IMAGE_PATH = "Assets/contraceptivefull/iStockhero.webp"
+
+_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_WHITESPACE = re.compile(r"\s+")
+_AROUND_PUNCTUATION = re.compile(r"\s*([{};,>])\s*")
+
+
+class CssBundle(NamedTuple):
+    text: str
+    digest: str
+    source_bytes: int
+
+
+def minify_css(text: str) -> str:
+    text = _COMMENT.sub("", text)
+    text = _WHITESPACE.sub(" ", text)
+    text = _AROUND_PUNCTUATION.sub(r"\1", text)
+    text = re.sub(r":\s+", ":", text)
+    return text.replace(";}", "}").strip()
+
+
+def _stamp(paths) -> Tuple:
+    stamps = []
+    for path in paths:
+        try:
+            stat = path.stat()
+            stamps.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            stamps.append(None)
+    return tuple(stamps)
+
+
+def _read(path: Path) -> str:
+    try:
+        return path.read_text()
+    except OSError:
+        return ""
+
+
+_lock = threading.Lock()
+_bundle_cache: Dict[str, Tuple[Tuple, CssBundle]] = {}
+_page_cache: Dict[str, Tuple[Tuple, str]] = {}
+
+
+def build_bundle(hero_url: str) -> CssBundle:
+    """Minified bundle with the hero URL bound to --hero-image; rebuilt only when a source changes."""
+    stamp = _stamp(BUNDLE_SOURCES)
+    with _lock:
+        cached = _bundle_cache.get(hero_url)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+    sources = [_read(path) for path in BUNDLE_SOURCES]
+    text = f':root{{--hero-image:url("{hero_url}")}}' + "".join(minify_css(source) for source in sources)
+    bundle = CssBundle(
+        text=text,
+        digest=hashlib.sha256(text.encode()).hexdigest()[:16],
+        source_bytes=sum(len(source.encode()) for source in sources),
+    )
+    with _lock:
+        # Keyed by hero URL so inline and static asset modes can coexist.
+        _bundle_cache[hero_url] = (stamp, bundle)
+    return bundle
+
+
+def page_css(page: str) -> str:
+    path = PAGE_SOURCES[page]
+    stamp = _stamp((path,))
+    with _lock:
+        cached = _page_cache.get(page)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+    text = minify_css(_read(path))
+    with _lock:
+        _page_cache[page] = (stamp, text)
+    return text
+
+
+def size_report(hero_url: Optional[str] = None) -> str:
+    from core.static_assets import asset_url
+
+    bundle = build_bundle(hero_url if hero_url is not None else asset_url(HERO_IMAGE_PATH) or "")
+    rows = [
+        f"bundle sources:        {bundle.source_bytes:>9} bytes",
+        f"bundle minified:       {len(bundle.text.encode()):>9} bytes (digest {bundle.digest})",
+    ]
+    for page in PAGE_SOURCES:
+        raw = len(_read(PAGE_SOURCES[page]).encode())
+        rows.append(f"{page + ' page css:':<22} {raw:>9} -> {len(page_css(page).encode())} bytes minified")
+    return "\n".join(rows)
+
+
+if __name__ == "__main__":
+    print(size_report())
@@ -0,0 +1,121 @@
+import threading
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from core.methods_data import Method
+from core.quiz_logic import get_recommendations, get_ruleset
+from core.schema import QUIZ_QUESTIONS
+
+CATEGORIES = ("recommended", "caution", "contraindicated")
+CATEGORY_BITS = 2
+MAX_METHODS = 64 // CATEGORY_BITS
+
+# Boolean fields of encode_answers(), in key bit order. The q7 priority index
+# occupies the bits above them.
+FLAG_FIELDS = (
+    "has_smoke_heavy",
+    "has_clot",
+    "has_migraine",
+    "has_bp",
+    "is_breastfeeding",
+    "bmi_high",
+    "heavy_painful",
+)
+PRIORITIES = tuple(QUIZ_QUESTIONS["q7"]["options"])
+PRIORITY_INDEX = {p: i for i, p in enumerate(PRIORITIES)}
+PRIORITY_SHIFT = len(FLAG_FIELDS)
+TABLE_SIZE = len(PRIORITIES) << PRIORITY_SHIFT
+
+
+def encode_key(encoded: Dict[str, Any]) -> Optional[int]:
+    """Pack an encode_answers() dict into a table index, or None if it is out of range."""
+    priority_index = PRIORITY_INDEX.get(encoded["priority"])
+    if priority_index is None:
+        return None
+    key = priority_index << PRIORITY_SHIFT
+    for bit, field in enumerate(FLAG_FIELDS):
+        if encoded[field]:
+            key |= 1 << bit
+    return key
+
+
+def decode_key(key: int) -> Dict[str, Any]:
+    encoded: Dict[str, Any] = {field: bool(key >> bit & 1) for bit, field in enumerate(FLAG_FIELDS)}
+    encoded["priority"] = PRIORITIES[key >> PRIORITY_SHIFT]
+    return encoded
+
+
+class DecisionTable:
+    """Method categories for every encoded answer combination, one packed word per key.
+
+    Each word holds CATEGORY_BITS per method (an index into CATEGORIES) in
+    catalog order. Words are materialized into category -> method-index tuples
+    once per distinct word, so a lookup is an array read and a dict read.
+    """
+
+    def __init__(self, methods: Sequence[Method]):
+        if len(methods) > MAX_METHODS:
+            raise ValueError(f"DecisionTable supports at most {MAX_METHODS} methods, got {len(methods)}")
+        self.methods = methods
+        self.codes = array("Q", bytes(8 * TABLE_SIZE))
+        self._indices: Dict[int, Tuple[Tuple[int, ...], ...]] = {}
+        ruleset = get_ruleset(methods)
+        for key in range(TABLE_SIZE):
+            masks = ruleset.evaluate(decode_key(key))
+            code = 0
+            for i in range(len(methods)):
+                for category_index, mask in enumerate(masks):
+                    if mask >> i & 1:
+                        code |= category_index << (CATEGORY_BITS * i)
+            self.codes[key] = code
+            if code not in self._indices:
+                self._indices[code] = self._unpack(code)
+
+    def _unpack(self, code: int) -> Tuple[Tuple[int, ...], ...]:
+        mask = (1 << CATEGORY_BITS) - 1
+        buckets: Tuple[List[int], ...] = tuple([] for _ in CATEGORIES)
+        for i in range(len(self.methods)):
+            buckets[code >> (CATEGORY_BITS * i) & mask].append(i)
+        return tuple(tuple(b) for b in buckets)
+
+    def category_indices(self, key: int) -> Tuple[Tuple[int, ...], ...]:
+        return self._indices[self.codes[key]]
+
+    def lookup(self, key: int) -> Dict[str, List[Method]]:
+        methods = self.methods
+        return {
+            category: [methods[i] for i in indices]
+            for category, indices in zip(CATEGORIES, self.category_indices(key))
+        }
+
+
+# Keyed by id(methods); a catalog reload brings a new methods tuple, so only
+# the most recent few are kept.
+MAX_TABLES = 4
+_tables_lock = threading.Lock()
+_tables: Dict[int, DecisionTable] = {}
+
+
+def get_decision_table(methods: Sequence[Method]) -> DecisionTable:
+    """Compile (once per methods list) and return the decision table."""
+    table = _tables.get(id(methods))
+    if table is not None and table.methods is methods:
+        return table
+    with _tables_lock:
+        table = _tables.get(id(methods))
+        if table is None or table.methods is not methods:
+            table = DecisionTable(methods)
+            _tables.pop(id(methods), None)
+            _tables[id(methods)] = table
+            while len(_tables) > MAX_TABLES:
+                del _tables[next(iter(_tables))]
+        return table
+
+
+def lookup_recommendations(methods: Sequence[Method], encoded: Dict[str, Any]) -> Dict[str, List[Method]]:
+    """Table-backed equivalent of quiz_logic.get_recommendations()."""
+    key = encode_key(encoded)
+    if key is None:
+        return get_recommendations(methods, encoded)
+    return get_decision_table(methods).lookup(key)
+
@@ -0,0 +1,196 @@
+"""Process-wide cache of the finished markup for method cards and details.
+
+A method's card and details markup depends only on the method, its tier
+and the process-wide asset mode, not on the session. So it is built once
+per (method id, tier) and shared by every session and rerun. That includes
+the thumbnail URL, which in inline asset mode is a base64 data URI, and the
+details image markup, which points at a display-size derivative. In inline
+mode the details image is not inlined: the entry holds the derivative's
+path for st.image, which serves it as one media URL per process. The cache
+belongs to one catalog: the first lookup with a different
+``Catalog.content_hash`` empties it. Each entry also records the size and
+mtime of the method's thumbnail and details image, and a hit whose files
+have changed since is rebuilt, so an edited image is republished. It holds
+at most ``max_entries`` entries (methods x tiers fit many times over).
+Markup whose details image could not be read is not stored, so a restored
+image shows on the next render.
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Optional, Set, Tuple
+
+from core.asset_cache import APP_ROOT
+from core.methods_data import Catalog, Method
+from core.render_helpers import (
+    detail_image_file,
+    format_best_thumb_html,
+    format_card_label,
+    format_detail_image_html,
+    format_details_header_html,
+    format_effectiveness_html,
+    format_option_thumb_html,
+    format_phrase_list_html,
+)
+from core.static_assets import ASSET_MODE, asset_url
+from core.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 256
+_APP_ROOT_STR = str(APP_ROOT)
+
+# Details images found missing, so each is logged once until it is readable again.
+_missing_images: Set[str] = set()
+_missing_lock = threading.Lock()
+
+
+class MethodFragments(NamedTuple):
+    card_label: str
+    best_thumb: str
+    option_thumb: str
+    details_header: str
+    picture: Optional[str]
+    # Details image file for st.image, in inline asset mode instead of picture.
+    image_file: Optional[str]
+    pros: str
+    cons: str
+    effectiveness: str
+
+
+@traced()
+def build_method_fragments(method: Method, tier_key: str) -> MethodFragments:
+    """Card and details markup of a method in a tier.
+
+    A missing details image is logged as an error the first time and at
+    debug level on each later build (every render, since such markup is not
+    cached) until it is readable again.
+    """
+    thumb_url = asset_url(APP_ROOT / method.thumb) if method.thumb else None
+    picture = image_file = None
+    if method.image and ASSET_MODE == "inline":
+        path = detail_image_file(method.image)
+        image_file = str(path) if path else None
+    elif method.image:
+        picture = format_detail_image_html(method.image, method.name)
+    if method.image and picture is None and image_file is None:
+        with _missing_lock:
+            first = method.image not in _missing_images
+            _missing_images.add(method.image)
+        if first:
+            logger.error("Details image %s of method %s is missing or unreadable", method.image, method.id)
+        else:
+            logger.debug("Details image %s of method %s is still missing", method.image, method.id)
+    elif method.image:
+        with _missing_lock:
+            _missing_images.discard(method.image)
+    return MethodFragments(
+        card_label=format_card_label(method, tier_key),
+        best_thumb=format_best_thumb_html(thumb_url),
+        option_thumb=format_option_thumb_html(thumb_url, tier_key),
+        details_header=format_details_header_html(method, tier_key),
+        picture=picture,
+        image_file=image_file,
+        pros=format_phrase_list_html(method.pros, "pros-list", "Pros coming soon."),
+        cons=format_phrase_list_html(method.cons, "cons-list", "Cons coming soon."),
+        effectiveness=format_effectiveness_html(method),
+    )
+
+
+def method_asset_stamp(method: Method) -> Tuple:
+    """(mtime_ns, size) of the method's thumbnail and details image; None for a missing file."""
+    stamps = []
+    for rel_path in (method.thumb, method.image):
+        try:
+            # Runs on every lookup; joining strings is cheaper than joining Paths.
+            stat = os.stat(os.path.join(_APP_ROOT_STR, rel_path)) if rel_path else None
+        except OSError:
+            stat = None
+        stamps.append((stat.st_mtime_ns, stat.st_size) if stat else None)
+    return tuple(stamps)
+
+
+class FragmentCache:
+    """LRU of MethodFragments keyed by (method id, tier), emptied when the catalog changes.
+
+    Entries are shared across sessions and must not be modified.
+    ``build(method, tier_key)`` produces an entry from the catalog's own
+    Method, not the caller's: a fragment rerun still holds the Method objects
+    of its session's last full run, which may predate a reload. A method
+    missing from the catalog is built from the caller's Method and not stored,
+    nor is an entry whose details image could not be read. ``stamp(method)``
+    identifies the method's asset files; an entry is reused only while it is
+    unchanged.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        build: Callable[[Method, str], MethodFragments] = build_method_fragments,
+        stamp: Callable[[Method], Tuple] = method_asset_stamp,
+    ):
+        self.max_entries = max_entries
+        self.build = build
+        self.stamp = stamp
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Tuple, MethodFragments]]" = OrderedDict()
+        self._catalog_hash: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, catalog: Catalog, method: Method, tier_key: str) -> MethodFragments:
+        key = (method.id, tier_key)
+        current = catalog.by_id.get(method.id)
+        source = method if current is None else current
+        # Taken before building, so a file changed mid-build is caught on the next lookup.
+        stamp = self.stamp(source)
+        with self._lock:
+            if catalog.content_hash != self._catalog_hash:
+                if self._catalog_hash is not None:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._catalog_hash = catalog.content_hash
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        fragments = self.build(source, tier_key)
+        store = current is not None and (fragments.picture is not None or fragments.image_file is not None or not current.image)
+        with self._lock:
+            self.misses += 1
+            if store and self._catalog_hash == catalog.content_hash:
+                self._entries[key] = (stamp, fragments)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return fragments
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._catalog_hash = None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+FRAGMENT_CACHE = FragmentCache()
+
+
+def method_fragments(catalog: Catalog, method: Method, tier_key: str) -> MethodFragments:
+    """Card and details markup of a method in a tier, shared by all sessions."""
+    return FRAGMENT_CACHE.get(catalog, method, tier_key)
+
+
+def fragment_cache_stats() -> Dict[str, int]:
+    return FRAGMENT_CACHE.stats()
@@ -0,0 +1,228 @@
+"""Build responsive derivatives for the method images.
+
+Run from the repository root after changing anything under ``Assets/``::
+
+    python -m core.image_pipeline            # build changed derivatives + manifest
+    python -m core.image_pipeline --force    # rebuild every derivative
+    python -m core.image_pipeline --report   # size report for the current manifest
+
+The manifest records the SHA-256 of each source image. A build only
+re-encodes sources whose hash changed or whose derivatives are missing. At
+runtime, ``get_variants()`` returns no derivatives for a source that no
+longer matches its manifest entry (logging a warning once), so an edited
+image is served as its original until the pipeline is re-run.
+
+Requires Pillow (``pip install Pillow``). AVIF output needs Pillow >= 11.2
+built with libavif, or the ``pillow-avif-plugin`` package; without either,
+only WebP derivatives are written.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import sys
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from core.asset_cache import APP_ROOT, resolve_asset_path
+from core.methods_data import Method, get_catalog
+
+logger = logging.getLogger(__name__)
+
+DERIVED_DIR = APP_ROOT / "Assets" / "derived"
+MANIFEST_PATH = DERIVED_DIR / "manifest.json"
+MANIFEST_VERSION = 1
+
+IMAGE_WIDTHS = (320, 480, 720, 1080)
+THUMB_WIDTHS = (96, 192)
+FORMATS = ("avif", "webp")
+QUALITY = {"avif": 55, "webp": 75}
+
+_manifest_lock = threading.Lock()
+_manifest_cache: Tuple[Optional[Tuple[int, int]], Dict[str, Any]] = (None, {})
+# Source path -> ((mtime_ns, size), sha256), so a source is only re-hashed when it changes.
+_source_digests: Dict[str, Tuple[Tuple[int, int], str]] = {}
+_stale_reported: Set[str] = set()
+
+
+def referenced_assets(methods: Optional[Iterable[Method]] = None) -> List[Tuple[str, Tuple[int, ...]]]:
+    if methods is None:
+        methods = get_catalog().methods
+    assets = []
+    for method in methods:
+        if method.image:
+            assets.append((method.image, IMAGE_WIDTHS))
+        if method.thumb:
+            assets.append((method.thumb, THUMB_WIDTHS))
+    return assets
+
+
+def _avif_supported() -> bool:
+    from PIL import features
+
+    if features.check("avif"):
+        return True
+    try:
+        import pillow_avif  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def source_digest(rel_path: str) -> Optional[str]:
+    """SHA-256 of a source image, re-hashed only when its mtime or size changes; None if unreadable."""
+    source = resolve_asset_path(rel_path)
+    try:
+        stat = source.stat()
+    except OSError:
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _manifest_lock:
+        cached = _source_digests.get(rel_path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    try:
+        digest = hashlib.sha256(source.read_bytes()).hexdigest()
+    except OSError:
+        return None
+    with _manifest_lock:
+        _source_digests[rel_path] = (stamp, digest)
+    return digest
+
+
+def _is_current(entry: Optional[Dict[str, Any]], digest: Optional[str]) -> bool:
+    """Whether a manifest entry was built from the source with this digest and all its files exist."""
+    return (
+        entry is not None
+        and digest is not None
+        and entry.get("sha256") == digest
+        and all((APP_ROOT / v["path"]).exists() for v in entry["variants"])
+    )
+
+
+def build_derivatives(methods: Optional[Iterable[Method]] = None, force: bool = False) -> Dict[str, Any]:
+    try:
+        from PIL import Image
+    except ImportError:
+        raise SystemExit("Pillow is required to build image derivatives: pip install Pillow")
+
+    formats = [f for f in FORMATS if f != "avif" or _avif_supported()]
+    if "avif" not in formats:
+        print("AVIF encoder unavailable; writing WebP derivatives only.", file=sys.stderr)
+
+    DERIVED_DIR.mkdir(parents=True, exist_ok=True)
+    previous = {} if force else load_manifest().get("assets", {})
+    manifest: Dict[str, Any] = {"version": MANIFEST_VERSION, "assets": {}}
+
+    for rel_path, widths in referenced_assets(methods):
+        source = resolve_asset_path(rel_path)
+        digest = source_digest(rel_path)
+        if _is_current(previous.get(rel_path), digest):
+            manifest["assets"][rel_path] = previous[rel_path]
+            continue
+        with Image.open(source) as img:
+            img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+            original_width, original_height = img.size
+            # Never upscale; the original width is the widest derivative.
+            target_widths = sorted({w for w in widths if w < original_width} | {min(max(widths), original_width)})
+            variants = []
+            for width in target_widths:
+                height = round(original_height * width / original_width)
+                resized = img if width == original_width else img.resize((width, height), Image.LANCZOS)
+                for fmt in formats:
+                    out_path = DERIVED_DIR / f"{source.stem}-{width}w.{fmt}"
+                    resized.save(out_path, fmt.upper(), quality=QUALITY[fmt])
+                    variants.append({
+                        "format": fmt,
+                        "width": width,
+                        "height": height,
+                        "path": out_path.relative_to(APP_ROOT).as_posix(),
+                        "bytes": out_path.stat().st_size,
+                    })
+        manifest["assets"][rel_path] = {
+            "width": original_width,
+            "height": original_height,
+            "bytes": source.stat().st_size,
+            "sha256": digest,
+            "variants": variants,
+        }
+
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2) + "\n")
+    return manifest
+
+
+def load_manifest() -> Dict[str, Any]:
+    """Return the derivative manifest, re-reading it only when the file changes."""
+    global _manifest_cache
+    try:
+        stat = MANIFEST_PATH.stat()
+    except OSError:
+        return {}
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _manifest_lock:
+        if _manifest_cache[0] == stamp:
+            return _manifest_cache[1]
+        try:
+            manifest = json.loads(MANIFEST_PATH.read_text())
+        except (OSError, ValueError):
+            manifest = {}
+        if manifest.get("version") != MANIFEST_VERSION:
+            manifest = {}
+        _manifest_cache = (stamp, manifest)
+        return manifest
+
+
+def get_variants(rel_path: str) -> List[Dict[str, Any]]:
+    """Derivatives of a source image, or none if it changed since they were built."""
+    entry = load_manifest().get("assets", {}).get(rel_path)
+    if not entry:
+        return []
+    if entry.get("sha256") != source_digest(rel_path):
+        with _manifest_lock:
+            report = rel_path not in _stale_reported
+            _stale_reported.add(rel_path)
+        if report:
+            logger.warning("%s changed since its derivatives were built; serving the original until "
+                           "python -m core.image_pipeline is re-run", rel_path)
+        return []
+    return entry["variants"]
+
+
+def size_report(manifest: Dict[str, Any], display_width: int = 720) -> str:
+    """Per-asset bytes: original vs. the variant a browser would pick at display_width."""
+    rows = [f"{'asset':<58} {'original':>10} {'webp@' + str(display_width):>10} {'avif@' + str(display_width):>10} {'saved':>8}"]
+    total_original = total_best = 0
+    for rel_path, entry in sorted(manifest.get("assets", {}).items()):
+        picks = {}
+        for fmt in FORMATS:
+            candidates = [v for v in entry["variants"] if v["format"] == fmt]
+            wide_enough = [v for v in candidates if v["width"] >= display_width]
+            pick = min(wide_enough, key=lambda v: v["width"]) if wide_enough else max(candidates, key=lambda v: v["width"], default=None)
+            picks[fmt] = pick["bytes"] if pick else None
+        best = min((b for b in picks.values() if b is not None), default=entry["bytes"])
+        total_original += entry["bytes"]
+        total_best += best
+        saved = 100 * (1 - best / entry["bytes"]) if entry["bytes"] else 0
+        rows.append(
+            f"{rel_path:<58} {entry['bytes']:>10} {picks['webp'] or '-':>10} {picks['avif'] or '-':>10} {saved:>7.0f}%"
+        )
+    if total_original:
+        rows.append(f"{'total':<58} {total_original:>10} {'':>10} {total_best:>10} {100 * (1 - total_best / total_original):>7.0f}%")
+    return "\n".join(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="rebuild every derivative, changed or not")
+    parser.add_argument("--report", action="store_true", help="print the size report for the existing manifest without rebuilding")
+    parser.add_argument("--display-width", type=int, default=720, help="CSS pixel width used to pick variants in the report")
+    args = parser.parse_args(argv)
+
+    manifest = load_manifest() if args.report else build_derivatives(force=args.force)
+    if not manifest:
+        raise SystemExit(f"No manifest at {MANIFEST_PATH}; run without --report first.")
+    print(size_report(manifest, args.display_width))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Opt-in timing and emitted-HTML histograms for the render functions.
+
+Enable with ``CC_INSTRUMENT=1``. When disabled, ``instrument()`` returns the
+decorated function unchanged, so there is no per-call overhead. When
+enabled, every ``st.markdown`` body is counted towards all instrumented
+calls active on the current thread, and a summary is logged at most every
+``CC_INSTRUMENT_LOG_SECONDS`` seconds (default 60). The app also renders the
+stats as JSON at ``?stats=1``.
+"""
+import bisect
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+INSTRUMENTATION_ENABLED = os.environ.get("CC_INSTRUMENT", "").strip().lower() in ("1", "true", "yes", "on")
+LOG_INTERVAL_SECONDS = float(os.environ.get("CC_INSTRUMENT_LOG_SECONDS", "60"))
+
+DURATION_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts[i] holds observations <= buckets[i], the last slot the overflow."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket containing the q-th observation (None if overflowed or empty)."""
+        with self._lock:
+            if not self.count:
+                return None
+            target = q * self.count
+            seen = 0
+            for bound, n in zip(self.buckets, self.counts):
+                seen += n
+                if seen >= target:
+                    return bound
+            return None
+
+    def state(self) -> Tuple[int, float, List[int]]:
+        """(count, sum, per-bucket counts), read together."""
+        with self._lock:
+            return self.count, self.sum, list(self.counts)
+
+    def snapshot(self) -> Dict[str, Any]:
+        count, total, counts = self.state()
+        return {
+            "count": count,
+            "sum": round(total, 3),
+            "mean": round(total / count, 3) if count else None,
+            "p50_le": self.quantile(0.5),
+            "p95_le": self.quantile(0.95),
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], counts)),
+        }
+
+
+_registry_lock = threading.Lock()
+_durations: Dict[str, Histogram] = {}
+_emitted_bytes: Dict[str, Histogram] = {}
+_local = threading.local()
+_last_log = time.monotonic()
+
+
+def _histogram(registry: Dict[str, Histogram], name: str, buckets: Sequence[float]) -> Histogram:
+    histogram = registry.get(name)
+    if histogram is None:
+        with _registry_lock:
+            histogram = registry.setdefault(name, Histogram(buckets))
+    return histogram
+
+
+def _active_frames() -> List[List[int]]:
+    frames = getattr(_local, "frames", None)
+    if frames is None:
+        frames = _local.frames = []
+    return frames
+
+
+def record_emitted(size: int) -> None:
+    """Attribute emitted bytes to every instrumented call active on this thread."""
+    for frame in _active_frames():
+        frame[0] += size
+
+
+def instrument(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    def decorator(func: Callable) -> Callable:
+        if not INSTRUMENTATION_ENABLED:
+            return func
+        label = name or func.__name__
+        durations = _histogram(_durations, label, DURATION_BUCKETS_MS)
+        emitted = _histogram(_emitted_bytes, label, BYTES_BUCKETS)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            frames = _active_frames()
+            frame = [0]
+            frames.append(frame)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                durations.observe((time.perf_counter() - started) * 1000)
+                frames.pop()
+                emitted.observe(frame[0])
+                _maybe_log()
+
+        return wrapper
+
+    return decorator
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    with _registry_lock:
+        names = sorted(set(_durations) | set(_emitted_bytes))
+    return {
+        name: {
+            "duration_ms": _durations[name].snapshot() if name in _durations else None,
+            "emitted_bytes": _emitted_bytes[name].snapshot() if name in _emitted_bytes else None,
+        }
+        for name in names
+    }
+
+
+def _maybe_log() -> None:
+    global _last_log
+    now = time.monotonic()
+    if now - _last_log < LOG_INTERVAL_SECONDS:
+        return
+    _last_log = now
+    summary = {
+        name: (stats["duration_ms"]["count"], stats["duration_ms"]["mean"], stats["emitted_bytes"]["mean"])
+        for name, stats in snapshot().items()
+    }
+    logger.info("render stats (count, mean ms, mean bytes): %s", json.dumps(summary))
+
+
+def install_markdown_hook(st_module: Any) -> None:
+    """Count st.markdown bodies towards active instrumented calls (no-op when disabled)."""
+    if not INSTRUMENTATION_ENABLED or getattr(st_module.markdown, "_cc_instrumented", False):
+        return
+    original = st_module.markdown
+
+    @functools.wraps(original)
+    def markdown(body, *args, **kwargs):
+        record_emitted(len(str(body).encode()))
+        return original(body, *args, **kwargs)
+
+    markdown._cc_instrumented = True
+    st_module.markdown = markdown
@@ -1,135 +1,337 @@
-METHODS = [
-    {
-        "name": "Combined Oral Contraceptive Pill",
-        "image": "Assets/contraceptivefull/istockcocporiginal.webp",
-        "thumb": "Assets/Contraceptivethumbs/istockcocpthumb.webp",
-        "hormone_type": "combined",
-        "perfect": "<1%",
-        "typical": "7%",
-        "typical_failure": 7.0,
-        "pros": ["Regulates periods", "Reduces acne"],
-        "cons": ["Estrogen-related risks", "Daily pill"]
-    },
-    {
-        "name": "Progestin-only Pill",
-        "image": "Assets/contraceptivefull/istockprogestinoriginal.webp",
-        "thumb": "Assets/Contraceptivethumbs/istockprogestinthumb.webp",
-        "hormone_type": "progestin_only",
-        "perfect": "<1%",
-        "typical": "7%",
-        "typical_failure": 7.0,
-        "pros": ["No estrogen", "Safe with breastfeeding"],
-        "cons": ["Stricter timing", "Irregular bleeding"]
-    },
-    {
-        "name": "Male Condom",
-        "image": "Assets/contraceptivefull/istockmalecondomoriginal.webp",
-        "thumb": "Assets/Contraceptivethumbs/istockmalecondomthumb.webp",
-        "perfect": "2%",
-        "typical": "13%",
-        "typical_failure": 13.0,
-        "pros": ["STI protection", "No hormones", "Widely available"],
-        "cons": ["User-dependent", "Can break"]
-    },
-    {
-        "name": "Contraceptive Implant",
-        "image": "Assets/contraceptivefull/istockhormonalimplantoriginal.webp",
-        "thumb": "Assets/Contraceptivethumbs/istockhormonalimplantthumb.webp",
-        "perfect": "<1%",
-        "typical": "<1%",
-        "typical_failure": 0.2,
-        "pros": ["3-5 years protection", "Highly effective", "Reversible"],
-        "cons": ["Insertion procedure", "Irregular bleeding"]
-    },
-    {
-        "name": "Hormonal IUD (e.g., Mirena)",
-        "image": "Assets/contraceptivefull/istockhormonaliudoriginal.webp",
-        "thumb": "Assets/Contraceptivethumbs/istockhormonaliudthumb.webp",
-        "perfect": "<1%",
-        "typical": "<1%",
-        "typical_failure": 0.2,
-        "pros": ["5-8 years", "Lighter periods", "Low maintenance"],
-        "cons": ["Insertion cramping"]
-    },
-    {
-        "name": "Copper IUD (ParaGard)",
-        "image": "Assets/contraceptivefull/istockcopperiudoriginal.webp",
-        "thumb": "Assets/Contraceptivethumbs/istockcopperiudthumb.webp",
-        "perfect": "<1%",
-        "typical": "<1%",
-        "typical_failure": 0.2,
-        "pros": ["10+ years", "Hormone-free", "Emergency option"],
-        "cons": ["Heavier periods"]
-    },
-    {
-        "name": "Depo-Provera Injection",
-        "image": "Assets/contraceptivefull/istockdepoproveraoriginal.webp",
-        "thumb": "Assets/Contraceptivethumbs/istockdepoproverathumb.webp",
-        "perfect": "<1%",
-        "typical": "4%",
-        "typical_failure": 4.0,
-        "pros": ["Every 3 months", "No daily routine"],
-        "cons": ["Delayed fertility return", "Bone density concerns"]
-    },
-    {
-        "name": "Contraceptive Patch",
-        "image": "Assets/contraceptivefull/istockhormonalpatchoriginal.webp",
-        "thumb": "Assets/Contraceptivethumbs/istockhormonalpatchthumb.webp",
-        "perfect": "<1%",
-        "typical": "7%",
-        "typical_failure": 7.0,
-        "pros": ["Weekly change", "Regulates periods"],
-        "cons": ["Visible", "Skin irritation possible"]
-    },
-    {
-        "name": "Vaginal Ring (NuvaRing)",
-        "image": "Assets/contraceptivefull/istockvaginalringoriginal.webp",
-        "thumb": "Assets/Contraceptivethumbs/istockvaginalringthumb.webp",
-        "perfect": "<1%",
-        "typical": "7%",
-        "typical_failure": 7.0,
-        "pros": ["Monthly", "Low dose hormones"],
-        "cons": ["Insertion required"]
-    },
-    {
-        "name": "Female Condom",
-        "image": "Assets/contraceptivefull/istockfemalecondomoriginal.webp",
-        "thumb": "Assets/Contraceptivethumbs/istockfemalecondomthumb.webp",
-        "perfect": "5%",
-        "typical": "21%",
-        "typical_failure": 21.0,
-        "pros": ["STI protection", "User control"],
-        "cons": ["Higher failure rate"]
-    },
-    {
-        "name": "Diaphragm",
-        "image": "Assets/contraceptivefull/istockdiaphragmoriginal.webp",
-        "thumb": "Assets/Contraceptivethumbs/istockdiaphragmthumb.webp",
-        "perfect": "6%",
-        "typical": "17%",
-        "typical_failure": 17.0,
-        "pros": ["Reusable", "Hormone-free"],
-        "cons": ["Insertion each time", "Spermicide needed"]
-    },
-    {
-        "name": "Fertility Awareness",
-        "image": "Assets/contraceptivefull/istckfertilityawarenessoriginal.webp",
-        "thumb": "Assets/Contraceptivethumbs/istckfertilityawarenessthumb.webp",
-        "perfect": "1-9%",
-        "typical": "24%",
-        "typical_failure": 24.0,
-        "pros": ["No hormones", "Free"],
-        "cons": ["High effort", "Irregular cycles reduce reliability"]
-    },
-]
-
-TELEHEALTH_OPTIONS = [
-    {"name": "Nurx", "url": "https://www.nurx.com/birth-control/"},
-    {"name": "Pandia Health", "url": "https://www.pandiahealth.com"},
-    {"name": "Twentyeight Health", "url": "https://www.twentyeighthealth.com/birth-control"},
-    {"name": "Planned Parenthood Health Centers", "url": "https://www.plannedparenthood.org/health-center"},
-    {"name": "Lemonaid Health", "url": "https://www.lemonaidhealth.com/"},
-    {"name": "Sesame Care", "url": "https://sesamecare.com/medication/birth-control"},
-    {"name": "PRJKT RUBY", "url": "https://prjktruby.com"},
-    {"name": "GoodRx Care", "url": "https://www.goodrx.com/care"},
-]
+"""The method catalog: ``data/methods.json`` validated into immutable records.
+
+The file is read once per process and read again when its mtime or size
+changes, so edits go live on the next rerun without a restart. An edit that
+fails validation is logged and the previous catalog keeps serving.
+``Catalog.content_hash`` identifies the catalog's content (not its
+formatting); caches of anything derived from the catalog key on it. Check
+the file after editing with::
+
+    python -m core.methods_data
+
+Method fields (schema_version 1; every field is required, unknown fields are
+rejected). The structured attributes are read by the rules in
+core/quiz_logic.py:
+  id                  stable slug ([a-z0-9_.-]); used in URLs and widget keys
+  name                display name
+  image, thumb        asset paths relative to the app root, or null
+  delivery            pill | patch | ring | implant | iud | injection | barrier | behavioral
+  estrogen            contains estrogen
+  progestin           contains a progestin
+  larc                long-acting reversible contraception (implant, IUDs)
+  duration_months     months of protection per application (0 = daily / per use)
+  hormone_free        contains no hormones
+  fertility_return    immediate | weeks | after_removal | delayed
+  lighter_periods     typically reduces menstrual bleeding
+  perfect_failure_pct [low, high] percent with an unintended pregnancy in the
+  typical_failure_pct first year; low 0 reads as "under high" ("<1%")
+  pros, cons          lists of short phrases
+
+Telehealth options have a ``name`` and an ``https://`` ``url``.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from core.asset_cache import APP_ROOT
+
+logger = logging.getLogger(__name__)
+
+CATALOG_PATH = Path(os.environ.get("CC_CATALOG_PATH") or APP_ROOT / "data" / "methods.json")
+SCHEMA_VERSION = 1
+
+DELIVERY_TYPES = ("pill", "patch", "ring", "implant", "iud", "injection", "barrier", "behavioral")
+FERTILITY_RETURN = ("immediate", "weeks", "after_removal", "delayed")
+
+_ID_PATTERN = re.compile(r"[a-z0-9_.-]+")
+
+
+class FailureRate(NamedTuple):
+    """Percent with an unintended pregnancy in the first year, as a [low, high] range."""
+
+    low: float
+    high: float
+
+    @property
+    def label(self) -> str:
+        if self.low == self.high:
+            return f"{self.high:g}%"
+        if self.low == 0:
+            return f"<{self.high:g}%"
+        return f"{self.low:g}-{self.high:g}%"
+
+    def under(self, pct: float) -> bool:
+        """True if the whole range is below pct (a "<pct%" range counts)."""
+        return self.high < pct or (self.low == 0 and self.high == pct)
+
+
+class Method(NamedTuple):
+    id: str
+    name: str
+    image: Optional[str]
+    thumb: Optional[str]
+    delivery: str
+    estrogen: bool
+    progestin: bool
+    larc: bool
+    duration_months: int
+    hormone_free: bool
+    fertility_return: str
+    lighter_periods: bool
+    perfect_failure: FailureRate
+    typical_failure: FailureRate
+    pros: Tuple[str, ...]
+    cons: Tuple[str, ...]
+
+    @property
+    def hormone_type(self) -> Optional[str]:
+        if self.estrogen and self.progestin:
+            return "combined"
+        if self.progestin:
+            return "progestin_only"
+        return None
+
+
+class TelehealthOption(NamedTuple):
+    name: str
+    url: str
+
+
+class Catalog(NamedTuple):
+    schema_version: int
+    content_hash: str
+    methods: Tuple[Method, ...]
+    telehealth: Tuple[TelehealthOption, ...]
+    by_id: Mapping[str, Method]
+
+
+class CatalogError(ValueError):
+    """The catalog file could not be read or failed validation; ``problems`` lists every issue."""
+
+    def __init__(self, source: str, problems: List[str]):
+        super().__init__(f"{source}: " + "; ".join(problems))
+        self.problems = problems
+
+
+# JSON field -> (kind, choices). Kinds are checked by _check_field().
+METHOD_SCHEMA: Dict[str, Tuple[str, Optional[Tuple[str, ...]]]] = {
+    "id": ("id", None),
+    "name": ("text", None),
+    "image": ("asset", None),
+    "thumb": ("asset", None),
+    "delivery": ("choice", DELIVERY_TYPES),
+    "estrogen": ("bool", None),
+    "progestin": ("bool", None),
+    "larc": ("bool", None),
+    "duration_months": ("count", None),
+    "hormone_free": ("bool", None),
+    "fertility_return": ("choice", FERTILITY_RETURN),
+    "lighter_periods": ("bool", None),
+    "perfect_failure_pct": ("rate", None),
+    "typical_failure_pct": ("rate", None),
+    "pros": ("phrases", None),
+    "cons": ("phrases", None),
+}
+TELEHEALTH_SCHEMA: Dict[str, Tuple[str, Optional[Tuple[str, ...]]]] = {
+    "name": ("text", None),
+    "url": ("url", None),
+}
+
+
+def _check_field(kind: str, choices: Optional[Tuple[str, ...]], value: Any) -> Optional[str]:
+    """Problem description for value, or None if it is valid."""
+    if kind == "bool":
+        return None if isinstance(value, bool) else "must be true or false"
+    if kind == "count":
+        ok = isinstance(value, int) and not isinstance(value, bool) and value >= 0
+        return None if ok else "must be a non-negative integer"
+    if kind == "rate":
+        ok = (
+            isinstance(value, list) and len(value) == 2
+            and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value)
+            and 0 <= value[0] <= value[1] <= 100
+        )
+        return None if ok else "must be [low, high] with 0 <= low <= high <= 100"
+    if kind == "phrases":
+        ok = isinstance(value, list) and all(isinstance(v, str) and v.strip() for v in value)
+        return None if ok else "must be a list of non-empty strings"
+    if kind == "asset":
+        if value is None:
+            return None
+        if not isinstance(value, str) or not value:
+            return "must be a path or null"
+        return None if (APP_ROOT / value).is_file() else f"file {value!r} does not exist"
+    if not isinstance(value, str) or not value.strip():
+        return "must be a non-empty string"
+    if kind == "id" and not _ID_PATTERN.fullmatch(value):
+        return "must contain only a-z, 0-9, '_', '.' and '-'"
+    if kind == "choice" and value not in choices:
+        return f"must be one of {', '.join(choices)}"
+    if kind == "url" and not value.startswith("https://"):
+        return "must be an https:// URL"
+    return None
+
+
+def _check_record(raw: Any, schema: Dict[str, Tuple[str, Optional[Tuple[str, ...]]]], where: str, problems: List[str]) -> bool:
+    if not isinstance(raw, dict):
+        problems.append(f"{where}: must be an object")
+        return False
+    ok = True
+    for key in sorted(set(raw) - set(schema)):
+        problems.append(f"{where}.{key}: unknown field")
+        ok = False
+    for key, (kind, choices) in schema.items():
+        if key not in raw:
+            problems.append(f"{where}.{key}: missing")
+            ok = False
+            continue
+        problem = _check_field(kind, choices, raw[key])
+        if problem:
+            problems.append(f"{where}.{key}: {problem}")
+            ok = False
+    return ok
+
+
+def _method(raw: Dict[str, Any]) -> Method:
+    return Method(
+        id=sys.intern(raw["id"]),
+        name=raw["name"],
+        image=raw["image"],
+        thumb=raw["thumb"],
+        delivery=sys.intern(raw["delivery"]),
+        estrogen=raw["estrogen"],
+        progestin=raw["progestin"],
+        larc=raw["larc"],
+        duration_months=raw["duration_months"],
+        hormone_free=raw["hormone_free"],
+        fertility_return=sys.intern(raw["fertility_return"]),
+        lighter_periods=raw["lighter_periods"],
+        perfect_failure=FailureRate(*(float(v) for v in raw["perfect_failure_pct"])),
+        typical_failure=FailureRate(*(float(v) for v in raw["typical_failure_pct"])),
+        pros=tuple(raw["pros"]),
+        cons=tuple(raw["cons"]),
+    )
+
+
+def parse_catalog(data: Any, source: str = "catalog") -> Catalog:
+    """Validate decoded catalog JSON into a Catalog; raises CatalogError listing every problem."""
+    if not isinstance(data, dict):
+        raise CatalogError(source, ["top level must be an object"])
+    problems: List[str] = []
+    if data.get("schema_version") != SCHEMA_VERSION:
+        problems.append(f"schema_version: must be {SCHEMA_VERSION}, got {data.get('schema_version')!r}")
+    for key in sorted(set(data) - {"schema_version", "methods", "telehealth"}):
+        problems.append(f"{key}: unknown field")
+
+    methods: List[Method] = []
+    raw_methods = data.get("methods")
+    if not isinstance(raw_methods, list) or not raw_methods:
+        problems.append("methods: must be a non-empty list")
+        raw_methods = []
+    seen: Dict[str, int] = {}
+    for i, raw in enumerate(raw_methods):
+        if not _check_record(raw, METHOD_SCHEMA, f"methods[{i}]", problems):
+            continue
+        if raw["id"] in seen:
+            problems.append(f"methods[{i}].id: {raw['id']!r} already used by methods[{seen[raw['id']]}]")
+            continue
+        seen[raw["id"]] = i
+        methods.append(_method(raw))
+
+    telehealth: List[TelehealthOption] = []
+    raw_telehealth = data.get("telehealth")
+    if not isinstance(raw_telehealth, list):
+        problems.append("telehealth: must be a list")
+        raw_telehealth = []
+    for i, raw in enumerate(raw_telehealth):
+        if _check_record(raw, TELEHEALTH_SCHEMA, f"telehealth[{i}]", problems):
+            telehealth.append(TelehealthOption(raw["name"], raw["url"]))
+
+    if problems:
+        raise CatalogError(source, problems)
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return Catalog(
+        schema_version=SCHEMA_VERSION,
+        content_hash=hashlib.sha256(canonical.encode()).hexdigest()[:16],
+        methods=tuple(methods),
+        telehealth=tuple(telehealth),
+        by_id=MappingProxyType({m.id: m for m in methods}),
+    )
+
+
+def load_catalog(path: Path = CATALOG_PATH) -> Catalog:
+    try:
+        data = json.loads(path.read_bytes())
+    except (OSError, ValueError) as exc:
+        raise CatalogError(str(path), [f"cannot read: {exc}"]) from exc
+    return parse_catalog(data, str(path))
+
+
+class CatalogLoader:
+    """Process-wide catalog, reloaded when the file's mtime or size changes."""
+
+    def __init__(self, path: Path = CATALOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._catalog: Optional[Catalog] = None
+        self.reloads = 0
+
+    def get(self) -> Catalog:
+        try:
+            st = self.path.stat()
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        catalog = self._catalog
+        if catalog is not None and stamp == self._stamp:
+            return catalog
+        with self._lock:
+            if self._catalog is not None and stamp == self._stamp:
+                return self._catalog
+            try:
+                catalog = load_catalog(self.path)
+            except CatalogError as exc:
+                if self._catalog is None:
+                    raise
+                # Keep serving the last good catalog until the file changes again.
+                logger.error("Keeping the previous method catalog: %s", exc)
+                self._stamp = stamp
+                return self._catalog
+            if self._catalog is not None and catalog.content_hash != self._catalog.content_hash:
+                logger.info("Reloaded method catalog %s (%s)", self.path, catalog.content_hash)
+                self.reloads += 1
+            self._stamp = stamp
+            self._catalog = catalog
+            return catalog
+
+
+CATALOG_LOADER = CatalogLoader()
+
+
+def get_catalog() -> Catalog:
+    """The current catalog; cheap enough to call on every rerun (one stat())."""
+    return CATALOG_LOADER.get()
+
+
+def main() -> int:
+    try:
+        catalog = load_catalog()
+    except CatalogError as exc:
+        print(f"{CATALOG_PATH}: invalid", file=sys.stderr)
+        for problem in exc.problems:
+            print(f"  {problem}", file=sys.stderr)
+        return 1
+    print(f"{CATALOG_PATH}: {len(catalog.methods)} methods, {len(catalog.telehealth)} telehealth options, hash {catalog.content_hash}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""Prometheus metrics for the app process, served on a local port.
+
+Set ``CC_METRICS_PORT`` (for example 9108) and ``prepare_process()`` starts a
+daemon thread serving ``/metrics`` in the Prometheus text format on
+``CC_METRICS_HOST`` (default 127.0.0.1), for a scraper on the same host or
+network. Each replica behind the load balancer serves its own numbers.
+
+A rerun adds one observation to a histogram of its page. Everything else is
+read only when scraped, so reruns pay nothing for it:
+
+  cc_rerun_duration_seconds{page, scope}  histogram of script runs by routed
+      page (landing, quiz, results, other_options, legal, stats); scope is
+      "app" for full reruns and "fragment" for card expand/close reruns.
+      ``rate(cc_rerun_duration_seconds_count[1m])`` is reruns per second
+  cc_active_sessions                      sessions connected to this process
+  cc_cache_requests_total{cache, result}  hits and misses of the inline
+      asset (base64, inline mode), static asset (published copies, static
+      mode), recommendation, explanation and method fragment caches
+  cc_cache_entries{cache}                 entries held by each of them
+  process_resident_memory_bytes           RSS (Linux)
+  process_cpu_seconds_total               user + system CPU time
+
+Metrics are off when ``CC_METRICS_PORT`` is unset; ``rerun_timer()`` then
+times nothing.
+
+The same server counts funnel events that happen in the browser: the "Talk
+to a clinician" link goes straight to the booking site, and the page reports
+the click with ``navigator.sendBeacon()`` as ``POST /track?event=...&detail=...``
+(see ``core.analytics.track_beacon()``). The page posts to the metrics port
+on its own host, or to ``CC_TRACK_URL`` when a proxy exposes /track
+elsewhere; with neither, those clicks are not counted.
+"""
+import contextlib
+import functools
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from core.analytics import track_beacon
+from core.asset_cache import asset_cache_stats
+from core.fragment_cache import fragment_cache_stats
+from core.instrumentation import Histogram
+from core.recommendation_cache import explanation_cache_stats, recommendation_cache_stats
+from core.static_assets import published_asset_stats
+
+logger = logging.getLogger(__name__)
+
+METRICS_PORT = int(os.environ.get("CC_METRICS_PORT") or 0)
+METRICS_HOST = os.environ.get("CC_METRICS_HOST", "127.0.0.1")
+METRICS_ENABLED = METRICS_PORT > 0
+# Public URL of /track for the browser, if not the metrics port on the page's host.
+TRACK_URL = os.environ.get("CC_TRACK_URL", "").strip()
+
+RERUN_BUCKETS_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+CACHE_STATS: Dict[str, Callable[[], Dict[str, int]]] = {
+    "inline_asset": asset_cache_stats,
+    "static_asset": published_asset_stats,
+    "recommendation": recommendation_cache_stats,
+    "explanation": explanation_cache_stats,
+    "fragment": fragment_cache_stats,
+}
+
+_registry_lock = threading.Lock()
+_reruns: Dict[Tuple[str, str], Histogram] = {}
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def observe_rerun(page: str, seconds: float, scope: str = "app") -> None:
+    histogram = _reruns.get((page, scope))
+    if histogram is None:
+        with _registry_lock:
+            histogram = _reruns.setdefault((page, scope), Histogram(RERUN_BUCKETS_SECONDS))
+    histogram.observe(seconds)
+
+
+@contextlib.contextmanager
+def rerun_timer(page: str, started: Optional[float] = None, scope: str = "app") -> Iterator[None]:
+    """Observe the time from ``started`` (default: now) until the block exits, st.rerun()/st.stop() included."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    if started is None:
+        started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_rerun(page, time.perf_counter() - started, scope)
+
+
+def _in_fragment_rerun() -> bool:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return bool(ctx is not None and ctx.fragment_ids_this_run)
+
+
+def fragment_timer(page: str) -> Callable[[Callable], Callable]:
+    """Time an @st.fragment body as a rerun of ``page`` when it runs on its own, not within a full rerun."""
+    def decorator(func: Callable) -> Callable:
+        if not METRICS_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _in_fragment_rerun():
+                return func(*args, **kwargs)
+            with rerun_timer(page, scope="fragment"):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def active_sessions() -> Optional[int]:
+    try:
+        from streamlit.runtime import Runtime
+
+        if not Runtime.exists():
+            return None
+        return Runtime.instance()._session_mgr.num_active_sessions()
+    except Exception as exc:
+        logger.debug("Active session count unavailable: %s", exc)
+        return None
+
+
+def _process_stats() -> Tuple[Optional[int], float]:
+    """(RSS bytes or None, CPU seconds) of this process."""
+    times = os.times()
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, IndexError, ValueError):
+        rss = None
+    return rss, times.user + times.system
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+
+    def family(name: str, kind: str, text: str) -> None:
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    family("cc_rerun_duration_seconds", "histogram", "Script run duration by routed page.")
+    with _registry_lock:
+        reruns = sorted(_reruns.items())
+    for (page, scope), histogram in reruns:
+        count, total, counts = histogram.state()
+        labels = f'page="{page}",scope="{scope}"'
+        cumulative = 0
+        for bound, n in zip(histogram.buckets, counts):
+            cumulative += n
+            lines.append(f'cc_rerun_duration_seconds_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+        lines.append(f'cc_rerun_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+        lines.append(f"cc_rerun_duration_seconds_sum{{{labels}}} {_format_value(total)}")
+        lines.append(f"cc_rerun_duration_seconds_count{{{labels}}} {count}")
+
+    sessions = active_sessions()
+    if sessions is not None:
+        family("cc_active_sessions", "gauge", "Sessions connected to this process.")
+        lines.append(f"cc_active_sessions {sessions}")
+
+    stats = {name: read() for name, read in CACHE_STATS.items()}
+    family("cc_cache_requests_total", "counter", "Cache lookups by result.")
+    for name, values in stats.items():
+        lines.append(f'cc_cache_requests_total{{cache="{name}",result="hit"}} {values["hits"]}')
+        lines.append(f'cc_cache_requests_total{{cache="{name}",result="miss"}} {values["misses"]}')
+    family("cc_cache_entries", "gauge", "Entries held by each cache.")
+    for name, values in stats.items():
+        lines.append(f'cc_cache_entries{{cache="{name}"}} {values["entries"]}')
+
+    rss, cpu_seconds = _process_stats()
+    if rss is not None:
+        family("process_resident_memory_bytes", "gauge", "Resident memory size in bytes.")
+        lines.append(f"process_resident_memory_bytes {rss}")
+    family("process_cpu_seconds_total", "counter", "Total user and system CPU time spent in seconds.")
+    lines.append(f"process_cpu_seconds_total {_format_value(cpu_seconds)}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        path, _, query = self.path.partition("?")
+        if path != "/track":
+            self.send_error(404)
+            return
+        params = parse_qs(query)
+        counted = track_beacon(params.get("event", [""])[0], params.get("detail", [""])[0])
+        self.send_response(204 if counted else 400)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT) -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics from a daemon thread; once per process, None if the port cannot be bound."""
+    global _server
+    with _registry_lock:
+        if _server is not None:
+            return _server
+        try:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as exc:
+            logger.warning("Metrics server not started on %s:%s: %s", host, port, exc)
+            return None
+        _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="cc-metrics", daemon=True).start()
+    logger.info("Serving Prometheus metrics on http://%s:%s/metrics", host, _server.server_address[1])
+    return _server
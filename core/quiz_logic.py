@@ -1,56 +1,193 @@
-from typing import List, Dict, Any
-
-def evaluate_method(method: Dict[str, Any], encoded: Dict[str, Any]) -> str:
-    name = method["name"]
-    
-    has_smoke_heavy = encoded["has_smoke_heavy"]
-    has_clot = encoded["has_clot"]
-    has_migraine = encoded["has_migraine"]
-    has_bp = encoded["has_bp"]
-    is_breastfeeding = encoded["is_breastfeeding"]
-    priority = encoded["priority"]
-    
-    red = False
-    
-    if "Pill" in name or "Patch" in name or "Ring" in name:
-        if has_smoke_heavy or has_clot or has_migraine or has_bp:
-            red = True
-    
-    if "Implant" in name or "Hormonal IUD" in name or "Depo" in name:
-        if has_clot:
-            red = True
-    
-    if is_breastfeeding and ("hormonal" in name.lower() or "Pill" in name or "Patch" in name or "Ring" in name or "Implant" in name or "Hormonal IUD" in name or "Depo" in name):
-        if red:
-            return "contraindicated"
-        return "caution"
-    
-    if red:
-        return "contraindicated"
-    
-    if priority == "Highest effectiveness" and method["typical"] == "<1%":
-        return "recommended"
-    elif priority == "Avoiding hormones" and ("Copper IUD" in name or "Condom" in name or "Diaphragm" in name or "Fertility Awareness" in name):
-        return "recommended"
-    elif priority == "Managing periods" and "Lighter periods" in method["pros"]:
-        return "recommended"
-    elif priority == "Low maintenance (set and forget)" and ("years" in " ".join(method["pros"]) or "3 months" in " ".join(method["pros"])):
-        return "recommended"
-    elif priority == "Quick return to fertility" and ("Condom" in name or "Diaphragm" in name or "Fertility Awareness" in name):
-        return "recommended"
-    
-    return "caution"
-
-
-def get_recommendations(methods: List[Dict[str, Any]], encoded: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from core.instrumentation import instrument
+from core.methods_data import Method
+from core.tracing import traced
+
+RECOMMENDED = "recommended"
+CAUTION = "caution"
+CONTRAINDICATED = "contraindicated"
+
+# Method predicates over the structured attributes in core/methods_data.py.
+METHOD_PREDICATES: Dict[str, Callable[[Method], bool]] = {
+    "hormonal": lambda m: m.estrogen or m.progestin,
+    "short_acting_hormonal": lambda m: (m.estrogen or m.progestin) and m.delivery in ("pill", "patch", "ring"),
+    "long_acting_hormonal": lambda m: (m.estrogen or m.progestin) and m.duration_months >= 3,
+    "typical_failure_under_1pct": lambda m: m.typical_failure.under(1.0),
+    "hormone_free": lambda m: m.hormone_free,
+    "lighter_periods": lambda m: m.lighter_periods,
+    "long_duration": lambda m: m.duration_months >= 3,
+    "immediate_fertility_return": lambda m: m.fertility_return == "immediate",
+}
+
+
+class Rule(NamedTuple):
+    id: str
+    effect: str
+    target: str
+    flags: Tuple[str, ...] = ()
+    priority: Optional[str] = None
+    # Shown in "Why these recommendations?" when the rule decides a method's category.
+    reason: str = ""
+
+    def applies(self, encoded: Dict[str, Any]) -> bool:
+        if self.priority is not None:
+            return encoded["priority"] == self.priority
+        return any(encoded[flag] for flag in self.flags)
+
+
+RULES: Tuple[Rule, ...] = (
+    Rule("short_acting_hormonal_smoking", CONTRAINDICATED, "short_acting_hormonal", flags=("has_smoke_heavy",),
+         reason="Smoking increases the risk of blood clots and heart problems with short-acting hormonal methods."),
+    Rule("short_acting_hormonal_clots", CONTRAINDICATED, "short_acting_hormonal", flags=("has_clot",),
+         reason="Your history of blood clots means short-acting hormonal methods could raise your risk of another clot."),
+    Rule("short_acting_hormonal_migraine", CONTRAINDICATED, "short_acting_hormonal", flags=("has_migraine",),
+         reason="Migraines with aura increase stroke risk with short-acting hormonal methods."),
+    Rule("short_acting_hormonal_bp", CONTRAINDICATED, "short_acting_hormonal", flags=("has_bp",),
+         reason="High blood pressure can be worsened by short-acting hormonal methods."),
+    Rule("long_acting_hormonal_clots", CONTRAINDICATED, "long_acting_hormonal", flags=("has_clot",),
+         reason="With a history of blood clots, long-acting hormonal methods are also less likely to be suitable."),
+    Rule("hormonal_breastfeeding", CAUTION, "hormonal", flags=("is_breastfeeding",),
+         reason="Since you're breastfeeding, hormonal methods are worth discussing with a clinician before you choose one."),
+    Rule("priority_effectiveness", RECOMMENDED, "typical_failure_under_1pct", priority="Highest effectiveness",
+         reason="You prioritized highest effectiveness, so we've recommended methods with a typical-use failure rate under 1%."),
+    Rule("priority_avoid_hormones", RECOMMENDED, "hormone_free", priority="Avoiding hormones",
+         reason="You want to avoid hormones, so we've recommended hormone-free methods."),
+    Rule("priority_managing_periods", RECOMMENDED, "lighter_periods", priority="Managing periods",
+         reason="You want help managing periods, so we've recommended methods that tend to make periods lighter."),
+    Rule("priority_low_maintenance", RECOMMENDED, "long_duration", priority="Low maintenance (set and forget)",
+         reason="You prefer low maintenance, so we've recommended methods that last three months or longer."),
+    Rule("priority_fertility_return", RECOMMENDED, "immediate_fertility_return", priority="Quick return to fertility",
+         reason="You want a quick return to fertility, so we've recommended methods where fertility returns as soon as you stop."),
+)
+
+NO_MATCH_REASON = "Based on your answers, we've matched you with methods that align with your health profile and preferences."
+
+
+class Reason(NamedTuple):
+    rule_id: Optional[str]
+    effect: Optional[str]
+    text: str
+    # Names of the methods whose category this rule decided.
+    methods: Tuple[str, ...] = ()
+
+
+class Explanation(NamedTuple):
+    reasons: Tuple[Reason, ...]
+    # Method id -> ids of the rules that decided its category (empty: the caution default).
+    method_rules: Mapping[str, Tuple[str, ...]]
+
+
+class RuleSet:
+    """RULES compiled against a methods list into one bitset per rule (bit i = methods[i]).
+
+    Precedence: contraindicated wins; a caution rule (breastfeeding) blocks
+    a recommendation; anything neither contraindicated nor recommended is
+    caution.
+    """
+
+    def __init__(self, methods: Sequence[Method], rules: Tuple[Rule, ...] = RULES):
+        self.methods = methods
+        self.rules = rules
+        self.all_mask = (1 << len(methods)) - 1
+        predicate_masks = {
+            name: sum(1 << i for i, m in enumerate(methods) if predicate(m))
+            for name, predicate in METHOD_PREDICATES.items()
+        }
+        self.rule_masks = tuple(predicate_masks[rule.target] for rule in rules)
+
+    def evaluate(self, encoded: Dict[str, Any]) -> Tuple[int, int, int]:
+        """Return (recommended, caution, contraindicated) method bitsets."""
+        fired = {RECOMMENDED: 0, CAUTION: 0, CONTRAINDICATED: 0}
+        for rule, mask in zip(self.rules, self.rule_masks):
+            if rule.applies(encoded):
+                fired[rule.effect] |= mask
+        contraindicated = fired[CONTRAINDICATED]
+        recommended = fired[RECOMMENDED] & ~contraindicated & ~fired[CAUTION]
+        caution = self.all_mask & ~contraindicated & ~recommended
+        return recommended, caution, contraindicated
+
+    def explain(self, encoded: Dict[str, Any]) -> Tuple[Tuple[Rule, int], ...]:
+        """The rules that decided a category, each with the bitset of methods it placed there.
+
+        A rule that fired but lost to precedence for every method it targets
+        (a recommendation blocked by a contraindication) is left out.
+        """
+        decided = dict(zip((RECOMMENDED, CAUTION, CONTRAINDICATED), self.evaluate(encoded)))
+        explained = []
+        for rule, mask in zip(self.rules, self.rule_masks):
+            if rule.applies(encoded) and mask & decided[rule.effect]:
+                explained.append((rule, mask & decided[rule.effect]))
+        return tuple(explained)
+
+
+# Keyed by id(methods); a catalog reload brings a new methods tuple, so only
+# the most recent few are kept.
+MAX_RULESETS = 4
+_rulesets_lock = threading.Lock()
+_rulesets: Dict[int, RuleSet] = {}
+
+
+def get_ruleset(methods: Sequence[Method]) -> RuleSet:
+    ruleset = _rulesets.get(id(methods))
+    if ruleset is not None and ruleset.methods is methods:
+        return ruleset
+    with _rulesets_lock:
+        ruleset = _rulesets.get(id(methods))
+        if ruleset is None or ruleset.methods is not methods:
+            ruleset = RuleSet(methods)
+            _rulesets.pop(id(methods), None)
+            _rulesets[id(methods)] = ruleset
+            while len(_rulesets) > MAX_RULESETS:
+                del _rulesets[next(iter(_rulesets))]
+        return ruleset
+
+
+def evaluate_method(method: Method, encoded: Dict[str, Any]) -> str:
+    recommended, _, contraindicated = RuleSet([method]).evaluate(encoded)
+    if contraindicated:
+        return CONTRAINDICATED
+    if recommended:
+        return RECOMMENDED
+    return CAUTION
+
+
+@instrument()
+@traced()
+def get_recommendations(methods: Sequence[Method], encoded: Dict[str, Any]) -> Dict[str, List[Method]]:
     results = {
-        "recommended": [],
-        "caution": [],
-        "contraindicated": []
+        RECOMMENDED: [],
+        CAUTION: [],
+        CONTRAINDICATED: []
     }
-    
-    for method in methods:
-        category = evaluate_method(method, encoded)
-        results[category].append(method)
-    
+
+    masks = get_ruleset(methods).evaluate(encoded)
+    for i, method in enumerate(methods):
+        bit = 1 << i
+        for category, mask in zip(results, masks):
+            if mask & bit:
+                results[category].append(method)
+                break
+
     return results
+
+
+@instrument()
+@traced()
+def explain_recommendations(methods: Sequence[Method], encoded: Dict[str, Any]) -> Explanation:
+    """Reasons for get_recommendations(methods, encoded), one per rule that decided a category."""
+    reasons = []
+    method_rules: Dict[str, List[str]] = {m.id: [] for m in methods}
+    for rule, mask in get_ruleset(methods).explain(encoded):
+        decided = [m for i, m in enumerate(methods) if mask >> i & 1]
+        reasons.append(Reason(rule.id, rule.effect, rule.reason, tuple(m.name for m in decided)))
+        for method in decided:
+            method_rules[method.id].append(rule.id)
+    if not reasons:
+        reasons.append(Reason(None, None, NO_MATCH_REASON))
+    return Explanation(
+        reasons=tuple(reasons),
+        method_rules=MappingProxyType({method_id: tuple(ids) for method_id, ids in method_rules.items()}),
+    )
@@ -0,0 +1,97 @@
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from core.decision_table import lookup_recommendations
+from core.methods_data import Catalog, Method
+from core.quiz_logic import Explanation, explain_recommendations
+from core.schema import answers_fingerprint, encode_answers
+
+DEFAULT_MAX_ENTRIES = 1024
+
+Recommendations = Mapping[str, Tuple[Method, ...]]
+
+
+def _freeze(results: Dict[str, List[Method]]) -> Recommendations:
+    return MappingProxyType({category: tuple(methods) for category, methods in results.items()})
+
+
+def _recommend(methods: Sequence[Method], encoded: Dict[str, Any]) -> Recommendations:
+    return _freeze(lookup_recommendations(methods, encoded))
+
+
+class RecommendationCache:
+    """Process-wide LRU of read-only recommendation results keyed by answers fingerprint.
+
+    Sessions with the same answers share one result object, so results must
+    be treated as immutable (categories map to tuples). Keys include the
+    catalog's content hash, so a catalog edit never serves stale results.
+    ``compute(methods, encoded)`` produces an entry; it defaults to the
+    decision-table recommendations.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        compute: Callable[[Sequence[Method], Dict[str, Any]], Any] = _recommend,
+    ):
+        self.max_entries = max_entries
+        self.compute = compute
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, catalog: Catalog, answers: dict, fingerprint: Optional[str] = None) -> Any:
+        methods = catalog.methods
+        if fingerprint is None:
+            fingerprint = answers_fingerprint(answers)
+        if fingerprint is None:
+            return self.compute(methods, encode_answers(answers))
+
+        key = (catalog.content_hash, fingerprint)
+        with self._lock:
+            results = self._entries.get(key)
+            if results is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return results
+
+        results = self.compute(methods, encode_answers(answers))
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = results
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+RECOMMENDATION_CACHE = RecommendationCache()
+EXPLANATION_CACHE = RecommendationCache(compute=explain_recommendations)
+
+
+def cached_recommendations(catalog: Catalog, answers: dict, fingerprint: Optional[str] = None) -> Recommendations:
+    return RECOMMENDATION_CACHE.get(catalog, answers, fingerprint)
+
+
+def cached_explanations(catalog: Catalog, answers: dict, fingerprint: Optional[str] = None) -> Explanation:
+    """The "Why these recommendations?" reasons, shared by all sessions with the same answers."""
+    return EXPLANATION_CACHE.get(catalog, answers, fingerprint)
+
+
+def recommendation_cache_stats() -> Dict[str, int]:
+    return RECOMMENDATION_CACHE.stats()
+
+
+def explanation_cache_stats() -> Dict[str, int]:
+    return EXPLANATION_CACHE.stats()
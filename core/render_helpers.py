@@ -1,20 +1,195 @@
-from typing import List, Dict, Any
+import html
+from pathlib import Path
+from typing import Callable, Optional, Sequence
 
-def format_method_card_html(method: Dict[str, Any]) -> str:
+from core.image_pipeline import FORMATS, get_variants
+from core.methods_data import Method, TelehealthOption
+from core.quiz_logic import Reason
+from core.asset_cache import APP_ROOT
+from core.static_assets import ASSET_MODE, asset_url, guess_mime_type, publish_asset
+
+# Details card spans the viewport on phones and caps at the centered layout width.
+DETAIL_IMAGE_SIZES = "(max-width: 736px) 100vw, 704px"
+DETAIL_IMAGE_FALLBACK_WIDTH = 720
+
+TIER_CONFIG = {
+    "best": {
+        "title": "Best match",
+        "badge": "Best match",
+        "icon": "✓",
+        "class": "badge-best",
+        "microcopy": "Tends to align with your answers. Review key details below."
+    },
+    "consider": {
+        "title": "Worth considering",
+        "badge": "Worth considering",
+        "icon": "◯",
+        "class": "badge-consider",
+        "microcopy": "May suit you depending on preferences and tolerability."
+    },
+    "unlikely": {
+        "title": "Less likely to be suitable",
+        "badge": "Less likely",
+        "icon": "—",
+        "class": "badge-unlikely",
+        "microcopy": "Based on your answers, this option is less likely to fit. Consider discussing with a clinician if interested."
+    }
+}
+
+CATEGORY_MAP = {
+    "recommended": "best",
+    "caution": "consider",
+    "contraindicated": "unlikely"
+}
+
+# Other-option card thumbnail backgrounds when a method has no thumbnail.
+OPTION_THUMB_COLORS = {
+    "best": "var(--mint-border)",
+    "consider": "rgba(100,116,139,0.25)",
+    "unlikely": "rgba(209,73,91,0.25)",
+}
+
+
+def format_best_thumb_html(thumb_url: Optional[str]) -> str:
+    if thumb_url:
+        return f'<div class="best-thumb" style="background-image: url({thumb_url}); background-size: cover; background-position: center;"></div>'
+    return '<div class="best-thumb"></div>'
+
+
+def format_option_thumb_html(thumb_url: Optional[str], tier_key: str) -> str:
+    if thumb_url:
+        return f'<div style="width:100%; height:100%; min-height:64px; background-image: url({thumb_url}); background-size: cover; background-position: center; border-radius:0;"></div>'
+    return f'<div style="width:100%; height:100%; min-height:64px; background:{OPTION_THUMB_COLORS[tier_key]}; border-radius:0;"></div>'
+
+
+def format_card_label(method: Method, tier_key: str) -> str:
+    tier = TIER_CONFIG[tier_key]
+    return f"{method.name}\n{tier['icon']} {tier['badge']}"
+
+
+def format_details_header_html(method: Method, tier_key: str) -> str:
+    tier = TIER_CONFIG[tier_key]
+    return (
+        f"<div style='display:flex; justify-content:space-between; align-items:center; gap:12px;'>"
+        f"<div style='font-weight:800; font-size:1.05rem; color:var(--ink); text-align:left !important;'>{html.escape(method.name)}</div>"
+        f"<div class='badge {tier['class']}'>{tier['icon']} {tier['badge']}</div>"
+        f"</div>"
+    )
+
+
+def format_phrase_list_html(phrases: Sequence[str], css_class: str, empty_text: str) -> str:
+    if phrases:
+        return f"<ul class='{css_class}'>" + "".join(f"<li>{html.escape(p)}</li>" for p in phrases) + "</ul>"
+    return f"<div class='rec-meta'>{html.escape(empty_text)}</div>"
+
+
+def format_effectiveness_html(method: Method) -> str:
+    return f"<p style='text-align: left !important;'>{html.escape(method.typical_failure.label)} failure rate with typical use</p>"
+
+
+def format_method_card_html(method: Method) -> str:
     return (
-        f"<div class='method-card'><h3>{method['name']}</h3>"
-        f"<p><strong>Perfect use:</strong> {method['perfect']} failure<br>"
-        f"<strong>Typical use:</strong> {method['typical']} failure</p>"
-        f"<p><strong>Pros:</strong> {', '.join(method['pros'])}</p>"
-        f"<p><strong>Cons:</strong> {', '.join(method['cons'])}</p></div>"
+        f"<div class='method-card'><h3>{html.escape(method.name)}</h3>"
+        f"<p><strong>Perfect use:</strong> {html.escape(method.perfect_failure.label)} failure<br>"
+        f"<strong>Typical use:</strong> {html.escape(method.typical_failure.label)} failure</p>"
+        f"<p><strong>Pros:</strong> {html.escape(', '.join(method.pros))}</p>"
+        f"<p><strong>Cons:</strong> {html.escape(', '.join(method.cons))}</p></div>"
     )
 
 
-def format_recommendation_text(method: Dict[str, Any], include_failure: bool = True) -> str:
+def format_recommendation_text(method: Method, include_failure: bool = True) -> str:
     if include_failure:
-        return f"- {method['name']} ({method['typical']} typical failure)"
-    return f"- {method['name']}"
+        return f"- {method.name} ({method.typical_failure.label} typical failure)"
+    return f"- {method.name}"
+
+
+def format_reason_html(reason: Reason) -> str:
+    """One "Why these recommendations?" entry: the rule's reason and the methods it placed."""
+    methods = ""
+    if reason.methods:
+        tier = TIER_CONFIG[CATEGORY_MAP[reason.effect]]
+        methods = f"<div class='why-methods'>{tier['icon']} {tier['badge']}: {html.escape(', '.join(reason.methods))}</div>"
+    return f"<div class='why-reason'>{html.escape(reason.text)}{methods}</div>"
+
+
+def format_telehealth_link(service: TelehealthOption) -> str:
+    return f"[{service.name} →]({service.url})"
+
+
+def format_picture_html(
+    image_path: str,
+    alt: str,
+    sizes: str = DETAIL_IMAGE_SIZES,
+    url_for: Optional[Callable[[str], Optional[str]]] = None,
+) -> Optional[str]:
+    """<picture> markup with AVIF/WebP srcsets, or None if no derivatives are published.
+
+    ``alt`` is plain text and is escaped here. ``url_for`` maps a derivative's
+    repo-relative path to its URL; it defaults to publishing into the app's
+    static directory.
+    """
+    if url_for is None:
+        if ASSET_MODE == "inline":
+            return None
+        url_for = publish_asset
+    variants = get_variants(image_path)
+    if not variants:
+        return None
+
+    sources = []
+    fallback = None
+    for fmt in FORMATS:
+        candidates = sorted((v for v in variants if v["format"] == fmt), key=lambda v: v["width"])
+        if not candidates:
+            continue
+        srcset = []
+        for variant in candidates:
+            url = url_for(variant["path"])
+            if url is None:
+                return None
+            srcset.append(f"{url} {variant['width']}w")
+            if fmt == "webp" and (fallback is None or variant["width"] <= DETAIL_IMAGE_FALLBACK_WIDTH):
+                fallback = (url, variant)
+        sources.append(
+            f'<source type="{guess_mime_type(candidates[0]["path"])}" srcset="{", ".join(srcset)}" sizes="{sizes}">'
+        )
+    if fallback is None:
+        return None
+
+    url, variant = fallback
+    return (
+        f"<picture class='method-picture'>{''.join(sources)}"
+        f"<img src='{url}' width='{variant['width']}' height='{variant['height']}' alt='{html.escape(alt, quote=True)}' loading='lazy' decoding='async'>"
+        f"</picture>"
+    )
+
+
+def _display_variant(image_path: str) -> Optional[dict]:
+    """The widest WebP derivative up to DETAIL_IMAGE_FALLBACK_WIDTH, or None."""
+    candidates = [v for v in get_variants(image_path) if v["format"] == "webp" and v["width"] <= DETAIL_IMAGE_FALLBACK_WIDTH]
+    return max(candidates, key=lambda v: v["width"], default=None)
+
+
+def detail_image_file(image_path: str) -> Optional[Path]:
+    """Display-size file of a details image (its display-size derivative, else the original); None if missing."""
+    variant = _display_variant(image_path)
+    path = APP_ROOT / (variant["path"] if variant else image_path)
+    return path if path.is_file() else None
+
 
+def format_detail_image_html(image_path: str, alt: str) -> Optional[str]:
+    """Details image: the responsive <picture>, else one display-size <img>; None if the asset is missing.
 
-def format_telehealth_link(service: Dict[str, str]) -> str:
-    return f"[{service['name']} →]({service['url']})"
+    The <img> (no published derivatives) shows ``detail_image_file()``.
+    In inline asset mode its URL would be a data URI, so callers there show
+    the file with st.image instead. ``alt`` is plain text.
+    """
+    picture = format_picture_html(image_path, alt)
+    if picture:
+        return picture
+    variant = _display_variant(image_path)
+    url = asset_url(APP_ROOT / (variant["path"] if variant else image_path))
+    if url is None:
+        return None
+    size = f" width='{variant['width']}' height='{variant['height']}'" if variant else ""
+    return f"<div class='method-picture'><img src='{url}'{size} alt='{html.escape(alt, quote=True)}' decoding='async'></div>"
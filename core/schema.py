@@ -1,3 +1,8 @@
+from itertools import product
+from typing import Optional
+
+from core.tracing import traced
+
 QUESTIONS = {
     "age_group": {
         "label": "What is your age group?",
@@ -88,6 +93,7 @@ QUIZ_QUESTIONS = {
 }
 
 
+@traced()
 def encode_answers(answers: dict) -> dict:
     return {
         "has_smoke_heavy": answers.get("q2", "No") != "No",
@@ -99,3 +105,104 @@ def encode_answers(answers: dict) -> dict:
         "heavy_painful": answers.get("q4", "No significant issues") in ["Heavy bleeding", "Painful periods", "Both heavy and painful"],
         "priority": answers.get("q7", "Highest effectiveness")
     }
+
+
+def iter_answer_combinations():
+    """Every answers dict the quiz UI can produce (q6 is any non-empty subset)."""
+    single_ids = [q_id for q_id, q in QUIZ_QUESTIONS.items() if not q.get("multi")]
+    multi_ids = [q_id for q_id, q in QUIZ_QUESTIONS.items() if q.get("multi")]
+    multi_choices = []
+    for q_id in multi_ids:
+        options = QUIZ_QUESTIONS[q_id]["options"]
+        subsets = [
+            [o for bit, o in enumerate(options) if mask >> bit & 1]
+            for mask in range(1, 1 << len(options))
+        ]
+        multi_choices.append(subsets)
+    for singles in product(*(QUIZ_QUESTIONS[q_id]["options"] for q_id in single_ids)):
+        for multis in product(*multi_choices):
+            answers = dict(zip(single_ids, singles))
+            answers.update(zip(multi_ids, multis))
+            yield {q_id: answers[q_id] for q_id in QUIZ_QUESTIONS}
+
+
+def _answer_radix(question: dict) -> int:
+    if question.get("multi"):
+        return 1 << len(question["options"])
+    return len(question["options"]) + 1
+
+
+def answer_code_space() -> int:
+    """Number of distinct pack_answers() codes; every code is below it."""
+    size = 1
+    for question in QUIZ_QUESTIONS.values():
+        size *= _answer_radix(question)
+    return size
+
+
+def pack_answers(answers: dict) -> Optional[int]:
+    """Pack answers into one mixed-radix integer of option indexes (0 = unanswered).
+
+    Multi-select questions contribute a bitmask of chosen options. Returns
+    None if any answer is not one of the question's options.
+    """
+    code = 0
+    for q_id, question in QUIZ_QUESTIONS.items():
+        options = question["options"]
+        value = answers.get(q_id)
+        radix = _answer_radix(question)
+        if question.get("multi"):
+            digit = 0
+            for option in value or ():
+                if option not in options:
+                    return None
+                digit |= 1 << options.index(option)
+        else:
+            if value is None:
+                digit = 0
+            elif value in options:
+                digit = options.index(value) + 1
+            else:
+                return None
+        code = code * radix + digit
+    return code
+
+
+def unpack_answers(code: int) -> dict:
+    """Inverse of pack_answers(); unanswered questions are left out.
+
+    Multi-select answers come back in option order.
+    """
+    digits = {}
+    for q_id, question in reversed(QUIZ_QUESTIONS.items()):
+        code, digits[q_id] = divmod(code, _answer_radix(question))
+    answers = {}
+    for q_id, question in QUIZ_QUESTIONS.items():
+        digit = digits[q_id]
+        if not digit:
+            continue
+        options = question["options"]
+        if question.get("multi"):
+            answers[q_id] = [o for bit, o in enumerate(options) if digit >> bit & 1]
+        else:
+            answers[q_id] = options[digit - 1]
+    return answers
+
+
+def answers_fingerprint(answers: dict) -> Optional[str]:
+    """Short stable string identifying an answers dict, or None if it cannot be packed."""
+    code = pack_answers(answers)
+    if code is None:
+        return None
+    return code_fingerprint(code)
+
+
+def code_fingerprint(code: int) -> str:
+    """Base-36 form of a pack_answers() code, as used by answers_fingerprint()."""
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    out = ""
+    while True:
+        code, rem = divmod(code, 36)
+        out = digits[rem] + out
+        if not code:
+            return out
@@ -0,0 +1,233 @@
+"""Compact per-session quiz state and reclamation of idle sessions.
+
+Everything the app keeps between reruns lives in one ``QuizState`` stored at
+``st.session_state.quiz``: the answers packed into a single integer with
+``core.schema.pack_answers()``, the question index, the page flags as one bit
+field, the open method id, and how many questions the current attempt has
+reached (for the funnel analytics in core/analytics.py). Recommendations are not stored per session;
+they are looked up in the process-wide cache by ``fingerprint``.
+
+Sessions left open in a browser tab keep their state until the tab closes.
+``CC_IDLE_SESSION_POLICY`` sheds them once idle for
+``CC_IDLE_SESSION_SECONDS`` (default 1800):
+
+``off``   (default) keep every session.
+``clear`` the session's first script run after the idle period empties its
+          own state (answers and Streamlit's widget bookkeeping) and starts
+          from the landing page. Nothing is freed while the tab stays idle.
+``close`` idle sessions are closed with ``Runtime.close_session()``; the
+          browser reconnects with a new, empty session when the tab is used
+          again. Sessions register themselves from their own script runs, and
+          the sweep, run from script runs of any session at most once every
+          ``CC_IDLE_SWEEP_SECONDS`` (default 60), only reads ``last_active``.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, MutableMapping, Optional
+
+from core.schema import code_fingerprint, pack_answers, unpack_answers
+
+logger = logging.getLogger(__name__)
+
+IDLE_SESSION_POLICY = os.environ.get("CC_IDLE_SESSION_POLICY", "off").strip().lower()
+IDLE_SESSION_SECONDS = float(os.environ.get("CC_IDLE_SESSION_SECONDS", "1800"))
+IDLE_SWEEP_SECONDS = float(os.environ.get("CC_IDLE_SWEEP_SECONDS", "60"))
+
+SESSION_KEY = "quiz"
+
+
+class _Flag:
+    """Boolean attribute stored as one bit of QuizState.flags."""
+
+    def __init__(self, bit: int):
+        self.bit = bit
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return bool(obj.flags & self.bit)
+
+    def __set__(self, obj, value: bool) -> None:
+        obj.flags = obj.flags | self.bit if value else obj.flags & ~self.bit
+
+
+class QuizState:
+    """One session's quiz progress, packed into a handful of small ints."""
+
+    __slots__ = ("answers_code", "q_idx", "flags", "selected_method_id", "event_nonce", "reached", "last_active")
+
+    started = _Flag(1)
+    show_results = _Flag(2)
+    view_other_options = _Flag(4)
+    show_legal = _Flag(8)
+    # The landing view of this attempt has been counted.
+    landed = _Flag(16)
+
+    def __init__(self):
+        self.answers_code = 0
+        self.q_idx = 0
+        self.flags = 0
+        self.selected_method_id: Optional[str] = None
+        # hash() of the last applied quiz component event nonce.
+        self.event_nonce = 0
+        # Questions answered at the furthest point of this attempt.
+        self.reached = 0
+        self.last_active = time.monotonic()
+
+    @property
+    def answers(self) -> Dict[str, Any]:
+        """A fresh answers dict; mutating it does not change the state (use set_answer)."""
+        return unpack_answers(self.answers_code)
+
+    @property
+    def fingerprint(self) -> str:
+        return code_fingerprint(self.answers_code)
+
+    def answer(self, q_id: str) -> Any:
+        return self.answers.get(q_id)
+
+    def set_answer(self, q_id: str, value: Any) -> bool:
+        """Record one answer (None or [] clears it); False if value is not an option."""
+        answers = self.answers
+        if value is None or value == []:
+            answers.pop(q_id, None)
+        else:
+            answers[q_id] = value
+        return self.set_answers(answers)
+
+    def set_answers(self, answers: Dict[str, Any]) -> bool:
+        """Replace all answers; False (state unchanged) if any value is not an option."""
+        code = pack_answers(answers)
+        if code is None:
+            return False
+        self.answers_code = code
+        return True
+
+    def select_method(self, method_id: Optional[str]) -> None:
+        # Method ids come from a fixed set; interning shares one string across sessions.
+        self.selected_method_id = sys.intern(method_id) if method_id is not None else None
+
+    def take_event(self, nonce: Any) -> bool:
+        """True the first time a quiz component event nonce is seen."""
+        digest = hash(nonce)
+        if digest == self.event_nonce:
+            return False
+        self.event_nonce = digest
+        return True
+
+    def reach(self, answered: int) -> range:
+        """Record that the first ``answered`` questions are done; returns the newly reached question numbers."""
+        reached, self.reached = self.reached, max(self.reached, answered)
+        return range(reached + 1, answered + 1)
+
+    def reset(self) -> None:
+        """Start over: clear answers and return to the landing page."""
+        self.answers_code = 0
+        self.q_idx = 0
+        self.flags = 0
+        self.selected_method_id = None
+        self.reached = 0
+
+    def touch(self) -> None:
+        self.last_active = time.monotonic()
+
+    def __repr__(self) -> str:
+        return (
+            f"QuizState(answers={self.answers!r}, q_idx={self.q_idx}, flags={self.flags:#x}, "
+            f"selected_method_id={self.selected_method_id!r})"
+        )
+
+
+def get_quiz_state(session_state: MutableMapping[str, Any]) -> QuizState:
+    """The session's QuizState, created on first use; marks the session active.
+
+    Under an idle-session policy, a session idle past IDLE_SESSION_SECONDS has
+    its state emptied here, at the top of its own script run, and starts over.
+    """
+    quiz = session_state.get(SESSION_KEY)
+    if (
+        isinstance(quiz, QuizState)
+        and IDLE_SESSION_POLICY in ("clear", "close")
+        and time.monotonic() - quiz.last_active >= IDLE_SESSION_SECONDS
+    ):
+        session_state.clear()
+        quiz = None
+    if not isinstance(quiz, QuizState):
+        quiz = QuizState()
+        session_state[SESSION_KEY] = quiz
+        if IDLE_SESSION_POLICY == "close":
+            _register_session(quiz)
+    quiz.touch()
+    return quiz
+
+
+_sweep_lock = threading.Lock()
+_last_sweep = time.monotonic()
+# Session id -> that session's QuizState, for the "close" sweep. Written only
+# from each session's own script run; closed sessions are dropped on sweep.
+_sessions: Dict[str, QuizState] = {}
+
+
+def _register_session(quiz: QuizState) -> None:
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return
+    with _sweep_lock:
+        _sessions[ctx.session_id] = quiz
+
+
+def maybe_shed_idle_sessions() -> int:
+    """Close idle sessions if a "close" sweep is due; returns the number of sessions shed."""
+    global _last_sweep
+    if IDLE_SESSION_POLICY != "close":
+        return 0
+    now = time.monotonic()
+    if now - _last_sweep < IDLE_SWEEP_SECONDS or not _sweep_lock.acquire(blocking=False):
+        return 0
+    try:
+        _last_sweep = now
+        shed = shed_idle_sessions(IDLE_SESSION_SECONDS, now)
+    finally:
+        _sweep_lock.release()
+    if shed:
+        logger.info("Closed %d idle sessions (idle > %ss)", shed, IDLE_SESSION_SECONDS)
+    return shed
+
+
+def shed_idle_sessions(idle_seconds: float, now: Optional[float] = None) -> int:
+    """Close every registered session whose quiz state has been idle for idle_seconds.
+
+    The caller holds _sweep_lock. Sessions are only read here; closing goes
+    through ``Runtime.close_session()``, scheduled on the runtime's event loop
+    as Streamlit requires, which also stops a script run still in progress.
+    """
+    if now is None:
+        now = time.monotonic()
+    try:
+        from streamlit.runtime import Runtime
+
+        if not Runtime.exists():
+            return 0
+        runtime = Runtime.instance()
+        # Runtime has no public accessor for its loop; without it, no session is closed.
+        eventloop = runtime._get_async_objs().eventloop
+    except Exception as exc:
+        logger.warning("Idle session sweep unavailable: %s", exc)
+        return 0
+
+    shed = 0
+    for session_id, quiz in list(_sessions.items()):
+        if not runtime.is_active_session(session_id):
+            del _sessions[session_id]
+        elif now - quiz.last_active >= idle_seconds:
+            del _sessions[session_id]
+            eventloop.call_soon_threadsafe(runtime.close_session, session_id)
+            shed += 1
+    return shed
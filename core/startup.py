@@ -0,0 +1,31 @@
+"""Once-per-process setup for streamlit_app.py, kept off the per-rerun path.
+
+The app script re-executes on every rerun, but ``prepare_process()`` does
+its work only on the first run in a process. Profile what a fresh replica
+pays for its first request with::
+
+    python -m benchmarks.cold_start
+"""
+import threading
+from typing import Any
+
+from core.instrumentation import install_markdown_hook
+from core.metrics import METRICS_ENABLED, start_metrics_server
+
+
+_prepared = False
+_lock = threading.Lock()
+
+
+def prepare_process(st_module: Any) -> None:
+    """Run the app's per-process setup on the first call; later calls return immediately."""
+    global _prepared
+    if _prepared:
+        return
+    with _lock:
+        if _prepared:
+            return
+        install_markdown_hook(st_module)
+        if METRICS_ENABLED:
+            start_metrics_server()
+        _prepared = True
@@ -0,0 +1,109 @@
+import hashlib
+import logging
+import mimetypes
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from core.asset_cache import APP_ROOT, get_asset_base64, resolve_asset_path
+
+logger = logging.getLogger(__name__)
+
+# "static" serves published copies of Assets/ through Streamlit's static file
+# serving (server.enableStaticServing, see .streamlit/config.toml); "inline"
+# embeds base64 data URIs for environments without it.
+ASSET_MODE = os.environ.get("CC_ASSET_MODE", "static").strip().lower()
+
+STATIC_DIR = APP_ROOT / "static"
+PUBLISHED_DIR = STATIC_DIR / "assets"
+STATIC_URL_PREFIX = "app/static/assets"
+
+MIME_TYPES = {
+    ".webp": "image/webp",
+    ".avif": "image/avif",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+}
+
+_lock = threading.Lock()
+_published: Dict[str, Tuple[Tuple[int, int], str]] = {}
+_stats = {"hits": 0, "misses": 0}
+
+
+def guess_mime_type(path: Union[str, Path]) -> str:
+    suffix = Path(path).suffix.lower()
+    return MIME_TYPES.get(suffix) or mimetypes.guess_type(str(path))[0] or "application/octet-stream"
+
+
+def _hashed_name(full_path: Path, digest: str) -> str:
+    return f"{full_path.stem}.{digest[:12]}{full_path.suffix.lower()}"
+
+
+def publish_asset(path: Union[str, Path]) -> Optional[str]:
+    """Copy an asset into static/assets under a content-hashed name.
+
+    Returns the relative URL of the published file, or None if the asset is
+    missing or the static directory is not writable. The hashed name changes
+    with the content, so a cached copy is never stale. Streamlit's
+    ``/app/static`` route sends no Cache-Control header, only ETag and
+    Last-Modified, so browsers revalidate; a CDN or reverse proxy in front of
+    the app can cache ``static/assets`` for as long as it likes.
+    """
+    full_path = resolve_asset_path(path)
+    key = str(full_path)
+    try:
+        stat = full_path.stat()
+    except OSError:
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+
+    with _lock:
+        published = _published.get(key)
+        if published is not None and published[0] == stamp:
+            _stats["hits"] += 1
+            return published[1]
+        _stats["misses"] += 1
+
+    try:
+        data = full_path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        name = _hashed_name(full_path, digest)
+        target = PUBLISHED_DIR / name
+        if not target.exists():
+            PUBLISHED_DIR.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=PUBLISHED_DIR, delete=False) as tmp:
+                tmp.write(data)
+            os.replace(tmp.name, target)
+    except OSError as exc:
+        logger.warning("Could not publish %s to %s: %s", full_path, PUBLISHED_DIR, exc)
+        return None
+
+    url = f"{STATIC_URL_PREFIX}/{name}?v={digest[:12]}"
+    with _lock:
+        _published[key] = (stamp, url)
+    return url
+
+
+def published_asset_stats() -> Dict[str, int]:
+    """Hits (unchanged since published) and misses (hashed and copied) of publish_asset()."""
+    with _lock:
+        return {**_stats, "entries": len(_published)}
+
+
+def data_uri(path: Union[str, Path]) -> Optional[str]:
+    encoded = get_asset_base64(path)
+    if encoded is None:
+        return None
+    return f"data:{guess_mime_type(path)};base64,{encoded}"
+
+
+def asset_url(path: Union[str, Path]) -> Optional[str]:
+    """URL for an asset under the configured mode, falling back to inline."""
+    if ASSET_MODE != "inline":
+        url = publish_asset(path)
+        if url is not None:
+            return url
+    return data_uri(path)
@@ -0,0 +1,362 @@
+"""Export the results pages for every answer combination as a static site.
+
+The results are a pure function of the answers, so every page a visitor
+can reach after the quiz is rendered ahead of time and served by any plain
+HTTP server or CDN::
+
+    python -m core.static_site                # incremental build into dist/site
+    python -m core.static_site --force        # re-render every page
+    python -m http.server -d dist/site 8000   # preview
+
+Layout of the output directory:
+
+- ``index.html`` hosts the quiz tile component (``quiz/index.html``) and
+  jumps to ``results/<code>.html``, where ``code`` is
+  ``core.schema.answers_fingerprint()`` of the answers.
+- ``results/<code>.html`` holds the best matches, the reasons and the other
+  options grouped by tier, linking to ``methods/<method id>.html``.
+- ``assets/`` holds the stylesheet and images under content-hashed names.
+
+The build is incremental. Each page's inputs are hashed together with the
+templates. A page is only re-rendered and rewritten when that digest differs
+from ``manifest.json``. Pages and assets the build no longer produces are
+deleted.
+"""
+import argparse
+import hashlib
+import html
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.asset_cache import APP_ROOT, resolve_asset_path
+from core.css_bundle import minify_css
+from core.decision_table import lookup_recommendations
+from core.image_pipeline import get_variants
+from core.methods_data import Catalog, Method, get_catalog
+from core.quiz_logic import explain_recommendations
+from core.render_helpers import TIER_CONFIG, format_picture_html, format_reason_html
+from core.schema import QUIZ_QUESTIONS, answers_fingerprint, encode_answers, iter_answer_combinations
+
+DEFAULT_OUTPUT_DIR = APP_ROOT / "dist" / "site"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+STYLESHEET_SOURCES = (APP_ROOT / "styles.css", APP_ROOT / "css" / "static_site.css")
+INDEX_TEMPLATE_PATH = APP_ROOT / "frontend" / "static_site" / "index.html"
+QUIZ_COMPONENT_PATH = APP_ROOT / "frontend" / "quiz_tiles" / "index.html"
+
+BEST_MATCH_COUNT = 3
+THUMB_MAX_WIDTH = 192
+OTHER_GROUPS = (
+    ("Also Recommended", "best"),
+    ("Worth Considering", "consider"),
+    ("Less Likely Options", "unlikely"),
+)
+
+PAGE_TEMPLATE = """<!doctype html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<link rel="stylesheet" href="{stylesheet}">
+</head>
+<body>
+<main class="site">
+{body}
+</main>
+</body>
+</html>
+"""
+CARD_TEMPLATE = (
+    "<a class='card' href='{href}'>{thumb}<span class='card-body'>"
+    "<span class='card-name'>{name}</span>"
+    "<span class='badge {badge_class}'>{icon} {badge}</span></span></a>"
+)
+THUMB_TEMPLATE = "<img class='card-thumb' src='{src}' width='{width}' height='{height}' alt='' loading='lazy'>"
+TEMPLATES = (PAGE_TEMPLATE, CARD_TEMPLATE, THUMB_TEMPLATE)
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as tmp:
+        tmp.write(data)
+    # NamedTemporaryFile creates 0600 files; the site is served to everyone.
+    os.chmod(tmp.name, 0o644)
+    os.replace(tmp.name, path)
+
+
+class SiteBuilder:
+    """One export run: renders pages whose input digest changed and tracks every file it produces."""
+
+    def __init__(self, out_dir: Path, force: bool = False):
+        self.out_dir = out_dir
+        self.force = force
+        self.previous = {} if force else self._load_manifest()
+        self.pages: Dict[str, str] = {}
+        self.assets: Dict[str, str] = {}
+        self._shared: Dict[Tuple, List[Any]] = {}
+        self.written = 0
+        self.skipped = 0
+        self.template_digest = _digest(json.dumps([
+            TEMPLATES,
+            INDEX_TEMPLATE_PATH.read_text(),
+            QUIZ_COMPONENT_PATH.read_text(),
+        ]).encode())[:16]
+
+    def _load_manifest(self) -> Dict[str, str]:
+        try:
+            manifest = json.loads((self.out_dir / MANIFEST_NAME).read_text())
+        except (OSError, ValueError):
+            return {}
+        if manifest.get("version") != MANIFEST_VERSION:
+            return {}
+        return manifest.get("pages", {})
+
+    def asset(self, data: bytes, stem: str, suffix: str) -> str:
+        """Write ``data`` under a content-hashed name in assets/ and return its site-relative URL."""
+        name = f"{stem}.{_digest(data)[:12]}{suffix}"
+        url = f"assets/{name}"
+        if url not in self.assets:
+            target = self.out_dir / url
+            if not target.exists():
+                _write_atomic(target, data)
+            self.assets[url] = name
+        return url
+
+    def asset_file(self, rel_path: str) -> str:
+        path = resolve_asset_path(rel_path)
+        return self.asset(path.read_bytes(), path.stem, path.suffix.lower())
+
+    def page(self, rel_path: str, context: Any, render, share_key: Optional[Tuple] = None) -> None:
+        """Render ``context`` with ``render`` into ``rel_path`` unless its inputs are unchanged.
+
+        Pages passing the same ``share_key`` have the same context, so its
+        digest and rendered bytes are computed once.
+        """
+        shared = self._shared.get(share_key) if share_key is not None else None
+        if shared is None:
+            shared = [_digest(json.dumps([self.template_digest, context], sort_keys=True).encode())[:16], None]
+            if share_key is not None:
+                self._shared[share_key] = shared
+        digest = shared[0]
+        self.pages[rel_path] = digest
+        target = self.out_dir / rel_path
+        if self.previous.get(rel_path) == digest and target.exists():
+            self.skipped += 1
+            return
+        if shared[1] is None:
+            shared[1] = render(context).encode()
+        _write_atomic(target, shared[1])
+        self.written += 1
+
+    def finish(self) -> int:
+        """Delete files this build did not produce, write the manifest and return the number removed."""
+        removed = 0
+        keep = set(self.pages) | set(self.assets) | {MANIFEST_NAME}
+        for directory in ("results", "methods", "quiz", "assets"):
+            for path in (self.out_dir / directory).glob("*"):
+                if path.is_file() and path.relative_to(self.out_dir).as_posix() not in keep:
+                    path.unlink()
+                    removed += 1
+        manifest = {"version": MANIFEST_VERSION, "pages": dict(sorted(self.pages.items()))}
+        _write_atomic(self.out_dir / MANIFEST_NAME, (json.dumps(manifest, indent=0) + "\n").encode())
+        return removed
+
+
+def _page(title: str, stylesheet: str, body: str) -> str:
+    return PAGE_TEMPLATE.format(title=html.escape(title), stylesheet=stylesheet, body=body)
+
+
+def _thumb(builder: SiteBuilder, method: Method) -> Optional[Dict[str, Any]]:
+    """Smallest-bytes thumbnail: the widest WebP derivative up to THUMB_MAX_WIDTH, else the original."""
+    rel_path = method.thumb
+    if not rel_path:
+        return None
+    candidates = [v for v in get_variants(rel_path) if v["format"] == "webp" and v["width"] <= THUMB_MAX_WIDTH]
+    if candidates:
+        variant = max(candidates, key=lambda v: v["width"])
+        return {"src": builder.asset_file(variant["path"]), "width": variant["width"], "height": variant["height"]}
+    try:
+        return {"src": builder.asset_file(rel_path), "width": THUMB_MAX_WIDTH, "height": THUMB_MAX_WIDTH}
+    except OSError:
+        return None
+
+
+def _card_context(method: Method, tier_key: str, thumbs: Dict[str, Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    return {"id": method.id, "name": method.name, "tier": tier_key, "thumb": thumbs[method.id]}
+
+
+def _render_card(card: Dict[str, Any], prefix: str) -> str:
+    tier = TIER_CONFIG[card["tier"]]
+    thumb = card["thumb"]
+    return CARD_TEMPLATE.format(
+        href=f"{prefix}methods/{card['id']}.html",
+        thumb=THUMB_TEMPLATE.format(src=prefix + thumb["src"], width=thumb["width"], height=thumb["height"]) if thumb else "",
+        name=html.escape(card["name"]),
+        badge_class=tier["class"],
+        icon=tier["icon"],
+        badge=html.escape(tier["badge"]),
+    )
+
+
+def results_context(
+    catalog: Catalog, answers: Dict[str, Any], stylesheet: str, thumbs: Dict[str, Optional[Dict[str, Any]]]
+) -> Dict[str, Any]:
+    encoded = encode_answers(answers)
+    results = lookup_recommendations(catalog.methods, encoded)
+    others = {
+        "best": results["recommended"][BEST_MATCH_COUNT:],
+        "consider": results["caution"],
+        "unlikely": results["contraindicated"],
+    }
+    return {
+        "stylesheet": stylesheet,
+        "best": [_card_context(m, "best", thumbs) for m in results["recommended"][:BEST_MATCH_COUNT]],
+        "reasons": [format_reason_html(reason) for reason in explain_recommendations(catalog.methods, encoded).reasons],
+        "others": [
+            [title, [_card_context(m, tier_key, thumbs) for m in others[tier_key]]]
+            for title, tier_key in OTHER_GROUPS
+        ],
+    }
+
+
+def render_results(context: Dict[str, Any]) -> str:
+    parts = ["<p class='results-header'>Your Personalized Recommendations</p>"]
+    if context["best"]:
+        parts.extend(_render_card(card, "../") for card in context["best"])
+    else:
+        parts.append("<p>No perfect matches found, but check out other options below.</p>")
+    parts.append("<h2>Why these recommendations?</h2>")
+    parts.extend(context["reasons"])
+    if any(cards for _, cards in context["others"]):
+        parts.append("<h2>Other Options</h2>")
+        for (title, cards), (_, tier_key) in zip(context["others"], OTHER_GROUPS):
+            if cards:
+                parts.append(f"<p class='tier-heading tier-{tier_key}'>{title}</p>")
+                parts.extend(_render_card(card, "../") for card in cards)
+    parts.append("<a class='site-button' href='../index.html'>Start Over</a>")
+    return _page("Your Personalized Recommendations", "../" + context["stylesheet"], "\n".join(parts))
+
+
+def method_context(builder: SiteBuilder, catalog: Catalog, method: Method, stylesheet: str) -> Dict[str, Any]:
+    # format_picture_html() runs here rather than in the renderer so the
+    # copied derivatives' hashed URLs are part of the page's inputs.
+    picture = None
+    if method.image:
+        picture = format_picture_html(method.image, method.name, url_for=lambda p: "../" + builder.asset_file(p))
+    return {
+        "stylesheet": stylesheet,
+        "name": method.name,
+        "picture": picture,
+        "pros": list(method.pros),
+        "cons": list(method.cons),
+        "typical": method.typical_failure.label,
+        "telehealth": [service._asdict() for service in catalog.telehealth],
+    }
+
+
+def render_method(context: Dict[str, Any]) -> str:
+    def bullets(css_class: str, items: List[str], empty: str) -> str:
+        if not items:
+            return f"<p>{empty}</p>"
+        return f"<ul class='{css_class}'>" + "".join(f"<li>{html.escape(item)}</li>" for item in items) + "</ul>"
+
+    parts = [
+        "<div class='details-card'>",
+        f"<h1>{html.escape(context['name'])}</h1>",
+        context["picture"] or "",
+        "<div class='section-h'>Pros</div>",
+        bullets("pros-list", context["pros"], "Pros coming soon."),
+        "<div class='section-h'>Cons</div>",
+        bullets("cons-list", context["cons"], "Cons coming soon."),
+    ]
+    if context["typical"]:
+        parts.append("<div class='section-h'>Typical effectiveness</div>")
+        parts.append(f"<p>{html.escape(context['typical'])} failure rate with typical use</p>")
+    parts.append("<div class='section-h'>Get it online</div>")
+    parts.append("<ul>" + "".join(
+        f"<li><a href='{html.escape(s['url'])}' rel='noopener'>{html.escape(s['name'])}</a></li>"
+        for s in context["telehealth"]
+    ) + "</ul>")
+    parts.append("</div>")
+    parts.append("<a class='site-button' href='javascript:history.back()'>Back to results</a>")
+    return _page(context["name"], "../" + context["stylesheet"], "\n".join(parts))
+
+
+def index_context(stylesheet: str) -> Dict[str, Any]:
+    return {
+        "stylesheet": stylesheet,
+        "questions": [{"id": q_id, **question} for q_id, question in QUIZ_QUESTIONS.items()],
+    }
+
+
+def render_index(context: Dict[str, Any]) -> str:
+    questions = json.dumps(context["questions"]).replace("</", "<\\/")
+    return (
+        INDEX_TEMPLATE_PATH.read_text()
+        .replace("__STYLESHEET__", context["stylesheet"])
+        .replace("__QUESTIONS__", questions)
+    )
+
+
+def build_site(out_dir: Path = DEFAULT_OUTPUT_DIR, force: bool = False) -> Dict[str, Any]:
+    started = time.perf_counter()
+    catalog = get_catalog()
+    builder = SiteBuilder(out_dir, force)
+    css = minify_css("\n".join(path.read_text() for path in STYLESHEET_SOURCES))
+    stylesheet = builder.asset(css.encode(), "site", ".css")
+    thumbs = {m.id: _thumb(builder, m) for m in catalog.methods}
+
+    builder.page("index.html", index_context(stylesheet), render_index)
+    builder.page("quiz/index.html", {"source": QUIZ_COMPONENT_PATH.read_text()}, lambda context: context["source"])
+    for method in catalog.methods:
+        builder.page(f"methods/{method.id}.html", method_context(builder, catalog, method, stylesheet), render_method)
+
+    # Many answer combinations share a page; hash and render each distinct one once.
+    distinct = set()
+    for answers in iter_answer_combinations():
+        context = results_context(catalog, answers, stylesheet, thumbs)
+        share_key = (
+            tuple(c["id"] for c in context["best"]),
+            tuple(context["reasons"]),
+            tuple(tuple(c["id"] for c in cards) for _, cards in context["others"]),
+        )
+        distinct.add(share_key)
+        builder.page(f"results/{answers_fingerprint(answers)}.html", context, render_results, share_key)
+
+    removed = builder.finish()
+    total_bytes = sum(p.stat().st_size for p in out_dir.rglob("*") if p.is_file())
+    return {
+        "catalog": catalog.content_hash,
+        "pages": len(builder.pages),
+        "distinct_results": len(distinct),
+        "written": builder.written,
+        "skipped": builder.skipped,
+        "removed": removed,
+        "assets": len(builder.assets),
+        "bytes": total_bytes,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUTPUT_DIR, help="output directory")
+    parser.add_argument("--force", action="store_true", help="ignore the manifest and re-render every page")
+    args = parser.parse_args(argv)
+    summary = build_site(args.out, args.force)
+    print(json.dumps(summary), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Sampled span tracing of reruns, exported as OTLP/JSON lines.
+
+Enable with ``CC_TRACE_SAMPLE``, the fraction of reruns to trace (for
+example 0.05, or 1 for all). A sampled rerun becomes one trace. Its root span
+is the page router ("rerun", with a ``page`` attribute). The child spans are
+the functions decorated with ``traced()``: encode_answers(),
+get_recommendations(), explain_recommendations(), build_method_fragments()
+(thumbnail URL and card/details markup, on a fragment cache miss) and the
+render_* functions. A fragment-only rerun (a card expanded or closed) is
+sampled on its own and has the fragment as its root. An unsampled rerun
+marks its context as unsampled, so the fragments run within it are not
+sampled again.
+
+Each finished trace is appended to ``CC_TRACE_FILE`` (default
+``traces.jsonl`` in the app root) as one line: an OTLP/JSON
+ExportTraceServiceRequest. That is the format the OpenTelemetry Collector's
+file exporter writes and its ``otlpjsonfile`` receiver reads, and a line can
+be POSTed as-is to a collector's ``/v1/traces``. No answers or other user
+data are put in spans. Summarize the slowest traces with::
+
+    python -m core.tracing
+    python -m core.tracing traces.jsonl --top 5
+
+When disabled (the default, or a rate of 0), ``traced()`` returns the
+decorated function unchanged and ``span()`` returns a shared no-op context,
+so there is no per-call overhead. When enabled, an unsampled rerun pays one
+random() and each traced call one context variable lookup.
+"""
+import argparse
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from core.asset_cache import APP_ROOT
+
+logger = logging.getLogger(__name__)
+
+TRACE_SAMPLE = min(max(float(os.environ.get("CC_TRACE_SAMPLE") or 0), 0.0), 1.0)
+TRACE_FILE = Path(os.environ.get("CC_TRACE_FILE") or APP_ROOT / "traces.jsonl")
+TRACING_ENABLED = TRACE_SAMPLE > 0
+SERVICE_NAME = "contraceptive-compass"
+
+# OTLP status codes.
+STATUS_OK = 1
+STATUS_ERROR = 2
+# Streamlit ends a script run early with these; they are not failures.
+_CONTROL_FLOW = frozenset({"RerunException", "StopException"})
+
+_NULL_SPAN = contextlib.nullcontext()
+_write_lock = threading.Lock()
+
+
+class _Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(self, trace: "_Trace", parent_id: str, name: str, start_ns: int, attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = start_ns
+        self.end_ns = 0
+        self.attributes = attributes
+        self.status = STATUS_OK
+
+    def otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in self.attributes.items()],
+            "status": {"code": self.status},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _Trace:
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self):
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.spans: List[_Span] = []
+
+
+_current: contextvars.ContextVar[Optional[_Span]] = contextvars.ContextVar("cc_trace_span", default=None)
+# _current within a root that was not sampled: nothing under it is recorded.
+_UNSAMPLED: Any = object()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+@contextlib.contextmanager
+def _record(name: str, root: bool, started: Optional[float], attributes: Dict[str, Any]) -> Iterator[None]:
+    parent = _current.get()
+    if parent is _UNSAMPLED or parent is None and not root:
+        yield
+        return
+    if parent is None:
+        if random.random() >= TRACE_SAMPLE:
+            token = _current.set(_UNSAMPLED)
+            try:
+                yield
+            finally:
+                _current.reset(token)
+            return
+        trace = _Trace()
+    else:
+        trace = parent.trace
+    start_ns = time.time_ns()
+    if started is not None:
+        start_ns -= int((time.perf_counter() - started) * 1e9)
+    current = _Span(trace, parent.span_id if parent else "", name, start_ns, attributes)
+    token = _current.set(current)
+    try:
+        yield
+    except BaseException as exc:
+        current.attributes["exception.type"] = type(exc).__name__
+        if type(exc).__name__ not in _CONTROL_FLOW:
+            current.status = STATUS_ERROR
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current.reset(token)
+        trace.spans.append(current)
+        if parent is None:
+            export(trace)
+
+
+def span(name: str, root: bool = False, started: Optional[float] = None, **attributes: Any):
+    """Context manager timing a span; ``root`` starts a trace, if sampled, when no root is active.
+
+    ``started`` (a time.perf_counter() value) backdates the span's start.
+    """
+    if not TRACING_ENABLED:
+        return _NULL_SPAN
+    return _record(name, root, started, attributes)
+
+
+def traced(name: Optional[str] = None, root: bool = False) -> Callable[[Callable], Callable]:
+    """Decorator recording each call as a span of the active trace (``root``: see span())."""
+    def decorator(func: Callable) -> Callable:
+        if not TRACING_ENABLED:
+            return func
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            parent = _current.get()
+            if parent is _UNSAMPLED or parent is None and not root:
+                return func(*args, **kwargs)
+            with _record(label, root, None, {"code.function": func.__qualname__}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def export(trace: _Trace, path: Optional[Path] = None) -> None:
+    """Append one trace to the trace file as an OTLP/JSON ExportTraceServiceRequest line."""
+    request = {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": [s.otlp() for s in trace.spans]}],
+        }]
+    }
+    line = json.dumps(request, separators=(",", ":")) + "\n"
+    try:
+        with _write_lock, open(path or TRACE_FILE, "a", encoding="utf-8") as f:
+            f.write(line)
+    except OSError as exc:
+        logger.warning("Could not write trace to %s: %s", path or TRACE_FILE, exc)
+
+
+def read_traces(path: Path) -> List[List[Dict[str, Any]]]:
+    """The spans of each trace in an OTLP/JSON lines file."""
+    traces = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                request = json.loads(line)
+                traces.append([
+                    s for rs in request["resourceSpans"] for ss in rs["scopeSpans"] for s in ss["spans"]
+                ])
+    return traces
+
+
+def format_trace(spans: List[Dict[str, Any]]) -> str:
+    """Indented span tree with durations in ms, children in start order."""
+    children: Dict[str, List[Dict[str, Any]]] = {}
+    for s in spans:
+        children.setdefault(s.get("parentSpanId", ""), []).append(s)
+    rows = []
+
+    def walk(parent_id: str, depth: int) -> None:
+        for s in sorted(children.get(parent_id, []), key=lambda s: int(s["startTimeUnixNano"])):
+            ms = (int(s["endTimeUnixNano"]) - int(s["startTimeUnixNano"])) / 1e6
+            attrs = {a["key"]: next(iter(a["value"].values())) for a in s["attributes"] if a["key"] != "code.function"}
+            suffix = " " + " ".join(f"{k}={v}" for k, v in attrs.items()) if attrs else ""
+            rows.append(f"{ms:>9.2f} ms  {'  ' * depth}{s['name']}{suffix}")
+            walk(s["spanId"], depth + 1)
+
+    walk("", 0)
+    return "\n".join(rows)
+
+
+def _duration_ns(spans: List[Dict[str, Any]]) -> int:
+    roots = [s for s in spans if not s.get("parentSpanId")]
+    return sum(int(s["endTimeUnixNano"]) - int(s["startTimeUnixNano"]) for s in roots)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?", type=Path, default=TRACE_FILE, help="OTLP/JSON lines trace file")
+    parser.add_argument("--top", type=int, default=3, help="slowest traces to print")
+    args = parser.parse_args(argv)
+
+    try:
+        traces = read_traces(args.path)
+    except OSError as exc:
+        print(f"{args.path}: {exc}", file=sys.stderr)
+        return 1
+    print(f"{args.path}: {len(traces)} traces", file=sys.stderr)
+    for spans in sorted(traces, key=_duration_ns, reverse=True)[:args.top]:
+        print(format_trace(spans) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
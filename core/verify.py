@@ -0,0 +1,258 @@
+"""Equivalence checks for the recommendation engine and its precompiled paths.
+
+Run from the repository root::
+
+    python -m core.verify
+
+Exits non-zero and prints the first mismatches if any check fails.
+"""
+import json
+import sys
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from core.batch import MULTI_SEPARATOR, categorize_table
+from core.bulk import score_jsonl_chunk
+from core.decision_table import CATEGORIES, lookup_recommendations
+from core.methods_data import Method, get_catalog
+from core.quiz_logic import RULES, evaluate_method, explain_recommendations, get_recommendations
+from core.schema import QUIZ_QUESTIONS, answers_fingerprint, code_fingerprint, encode_answers, iter_answer_combinations, pack_answers, unpack_answers
+
+MAX_REPORTED = 5
+
+# Cells of unsupported types; each must make categorize_table() raise ValueError naming its question.
+INVALID_BATCH_CELLS: List[Tuple[str, Any]] = [
+    ("q1", {"a": 1}),
+    ("q2", 3),
+    ("q6", 5),
+    ("q6", [["x"]]),
+    ("q6", [None]),
+    ("q7", ["x"]),
+]
+
+
+def legacy_evaluate_method(method: Method, encoded: Dict[str, Any]) -> str:
+    """The original name-substring rules, kept as the reference for the rules engine."""
+    name = method.name
+
+    has_smoke_heavy = encoded["has_smoke_heavy"]
+    has_clot = encoded["has_clot"]
+    has_migraine = encoded["has_migraine"]
+    has_bp = encoded["has_bp"]
+    is_breastfeeding = encoded["is_breastfeeding"]
+    priority = encoded["priority"]
+
+    red = False
+
+    if "Pill" in name or "Patch" in name or "Ring" in name:
+        if has_smoke_heavy or has_clot or has_migraine or has_bp:
+            red = True
+
+    if "Implant" in name or "Hormonal IUD" in name or "Depo" in name:
+        if has_clot:
+            red = True
+
+    if is_breastfeeding and ("hormonal" in name.lower() or "Pill" in name or "Patch" in name or "Ring" in name or "Implant" in name or "Hormonal IUD" in name or "Depo" in name):
+        if red:
+            return "contraindicated"
+        return "caution"
+
+    if red:
+        return "contraindicated"
+
+    if priority == "Highest effectiveness" and method.typical_failure.label == "<1%":
+        return "recommended"
+    elif priority == "Avoiding hormones" and ("Copper IUD" in name or "Condom" in name or "Diaphragm" in name or "Fertility Awareness" in name):
+        return "recommended"
+    elif priority == "Managing periods" and "Lighter periods" in method.pros:
+        return "recommended"
+    elif priority == "Low maintenance (set and forget)" and ("years" in " ".join(method.pros) or "3 months" in " ".join(method.pros)):
+        return "recommended"
+    elif priority == "Quick return to fertility" and ("Condom" in name or "Diaphragm" in name or "Fertility Awareness" in name):
+        return "recommended"
+
+    return "caution"
+
+
+def _names(results: Dict[str, List[Method]]) -> Dict[str, List[str]]:
+    return {category: [m.name for m in methods] for category, methods in results.items()}
+
+
+def check_decision_table() -> Tuple[int, List[str]]:
+    """Compare the decision table with get_recommendations() for every answer combination."""
+    methods = get_catalog().methods
+    checked = 0
+    failures = []
+    for answers in [{}, *iter_answer_combinations()]:
+        encoded = encode_answers(answers)
+        expected = _names(get_recommendations(methods, encoded))
+        actual = _names(lookup_recommendations(methods, encoded))
+        checked += 1
+        if actual != expected:
+            failures.append(f"{answers}: expected {expected}, got {actual}")
+    return checked, failures
+
+
+def check_rules_engine() -> Tuple[int, List[str]]:
+    """Compare the attribute rules with the legacy name matching for every answer combination."""
+    methods = get_catalog().methods
+    checked = 0
+    failures = []
+    for answers in [{}, *iter_answer_combinations()]:
+        encoded = encode_answers(answers)
+        expected = {"recommended": [], "caution": [], "contraindicated": []}
+        for method in methods:
+            expected[legacy_evaluate_method(method, encoded)].append(method.name)
+            actual_single = evaluate_method(method, encoded)
+            if actual_single != legacy_evaluate_method(method, encoded):
+                failures.append(f"{answers}: evaluate_method({method.name!r}) returned {actual_single!r}")
+        actual = _names(get_recommendations(methods, encoded))
+        checked += 1
+        if actual != expected:
+            failures.append(f"{answers}: expected {expected}, got {actual}")
+    return checked, failures
+
+
+def check_answer_packing() -> Tuple[int, List[str]]:
+    """unpack_answers() must invert pack_answers() for every answer combination."""
+    checked = 0
+    failures = []
+    for answers in [{}, *iter_answer_combinations()]:
+        code = pack_answers(answers)
+        checked += 1
+        if unpack_answers(code) != answers:
+            failures.append(f"{answers}: unpacked to {unpack_answers(code)}")
+        elif code_fingerprint(code) != answers_fingerprint(answers):
+            failures.append(f"{answers}: code fingerprint {code_fingerprint(code)!r} differs")
+    return checked, failures
+
+
+def _batch_tables(rows: List[Dict[str, Any]], string_arrays: bool = True) -> List[Tuple[str, Any]]:
+    """The same answers as each supported columnar form of a batch table."""
+    lists = {q_id: [answers.get(q_id) for answers in rows] for q_id in QUIZ_QUESTIONS}
+    tables = [("lists", lists)]
+    if string_arrays:
+        joined = {
+            q_id: np.array(["" if value is None else MULTI_SEPARATOR.join(value) if isinstance(value, list) else value for value in column])
+            for q_id, column in lists.items()
+        }
+        tables.append(("string arrays", joined))
+    try:
+        import pandas as pd
+    except ImportError:
+        pass
+    else:
+        tables.append(("DataFrame", pd.DataFrame(lists)))
+    return tables
+
+
+def check_batch() -> Tuple[int, List[str]]:
+    """categorize_table() must match get_recommendations() row for row, for each table form."""
+    methods = get_catalog().methods
+    rows = [{}, *iter_answer_combinations()]
+    expected = np.empty((len(rows), len(methods)), dtype=np.uint8)
+    for row, answers in enumerate(rows):
+        results = get_recommendations(methods, encode_answers(answers))
+        for category_index, category in enumerate(CATEGORIES):
+            for method in results[category]:
+                expected[row, methods.index(method)] = category_index
+    checked = 0
+    failures = []
+    for name, table in _batch_tables(rows):
+        actual = categorize_table(table, methods)
+        checked += len(rows)
+        for row in np.flatnonzero((actual != expected).any(axis=1))[:MAX_REPORTED]:
+            failures.append(f"{name} {rows[row]}: expected {expected[row].tolist()}, got {actual[row].tolist()}")
+    for q_id, cell in INVALID_BATCH_CELLS:
+        for name, table in _batch_tables([*rows[:3], {q_id: cell}], string_arrays=False):
+            checked += 1
+            try:
+                categorize_table(table, methods)
+            except ValueError as exc:
+                if not str(exc).startswith(f"{q_id}:"):
+                    failures.append(f"{name} {q_id}={cell!r}: ValueError without the question: {exc}")
+            except Exception as exc:
+                failures.append(f"{name} {q_id}={cell!r}: expected ValueError, got {type(exc).__name__}: {exc}")
+            else:
+                failures.append(f"{name} {q_id}={cell!r}: expected ValueError, got a result")
+    return checked, failures
+
+
+def check_bulk_scoring() -> Tuple[int, List[str]]:
+    """Bulk scoring must mark only the JSONL lines with invalid cells and score the rest as get_recommendations() does."""
+
+    methods = get_catalog().methods
+    rows = [*iter_answer_combinations()][::997]
+    lines = [json.dumps({"id": row, **answers}) for row, answers in enumerate(rows)]
+    bad = {len(lines) + i: q_id for i, (q_id, _) in enumerate(INVALID_BATCH_CELLS)}
+    lines += [json.dumps({"id": row, q_id: cell}) for row, (q_id, cell) in zip(bad, INVALID_BATCH_CELLS)]
+    text, _, errors = score_jsonl_chunk(lines)
+    failures = []
+    if errors != len(bad):
+        failures.append(f"expected {len(bad)} rows with errors, got {errors}")
+    for row, line in enumerate(text.splitlines()):
+        result = json.loads(line)
+        if row in bad:
+            if not result.get("error", "").startswith(f"{bad[row]}:"):
+                failures.append(f"line {row}: expected a {bad[row]} error, got {result}")
+            continue
+        categories = get_recommendations(methods, encode_answers(rows[row]))
+        expected = {m.id: category for category, members in categories.items() for m in members}
+        if result.get("categories") != expected:
+            failures.append(f"line {row} {rows[row]}: expected {expected}, got {result}")
+    return len(lines), failures
+
+
+def check_explanations() -> Tuple[int, List[str]]:
+    """Every recommended or contraindicated method must be explained by rules with that effect.
+
+    Caution methods are explained by a caution rule or by none (the default),
+    and each reason must list exactly the methods that name its rule.
+    """
+    methods = get_catalog().methods
+    effects = {rule.id: rule.effect for rule in RULES}
+    checked = 0
+    failures = []
+    for answers in [{}, *iter_answer_combinations()]:
+        encoded = encode_answers(answers)
+        explanation = explain_recommendations(methods, encoded)
+        checked += 1
+        for category, members in get_recommendations(methods, encoded).items():
+            for method in members:
+                rule_ids = explanation.method_rules[method.id]
+                if any(effects[rule_id] != category for rule_id in rule_ids):
+                    failures.append(f"{answers}: {method.name!r} is {category} but explained by {rule_ids}")
+                elif category != "caution" and not rule_ids:
+                    failures.append(f"{answers}: {method.name!r} is {category} without a rule")
+        for reason in explanation.reasons:
+            named = tuple(m.name for m in methods if reason.rule_id in explanation.method_rules[m.id])
+            if reason.methods != named:
+                failures.append(f"{answers}: reason {reason.rule_id!r} lists {reason.methods}, expected {named}")
+    return checked, failures
+
+
+CHECKS: List[Tuple[str, Callable[[], Tuple[int, List[str]]]]] = [
+    ("rules engine", check_rules_engine),
+    ("decision table", check_decision_table),
+    ("answer packing", check_answer_packing),
+    ("explanations", check_explanations),
+    ("batch", check_batch),
+    ("bulk scoring", check_bulk_scoring),
+]
+
+
+def main() -> int:
+    ok = True
+    for name, check in CHECKS:
+        checked, failures = check()
+        status = "ok" if not failures else f"FAILED ({len(failures)} mismatches)"
+        print(f"{name}: {checked} combinations {status}")
+        for failure in failures[:MAX_REPORTED]:
+            print(f"  {failure}")
+        ok = ok and not failures
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
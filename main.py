@@ -1,6 +1,81 @@
-def main():
-    print("Hello from repl-nix-workspace!")
+"""Score a CSV or JSONL file of quiz answers in bulk.
+
+Each input row holds answers keyed by QUIZ_QUESTIONS id (q1 .. q7) as
+option strings. Missing or empty values mean unanswered. A q6 cell is a
+list (JSONL) or a ";"-joined string. Any other columns or keys, such as a
+respondent id, are copied through. Output rows are in input order and use
+the input's format:
+
+- CSV: the copied columns, one column per method id holding its category
+  (recommended, caution or contraindicated), and an ``error`` column.
+- JSONL: the copied keys plus ``"categories": {method id: category}``, or
+  ``"error"`` for a row that could not be scored.
+
+::
+
+    python main.py answers.csv -o results.csv
+    python main.py answers.jsonl -o results.jsonl --workers 8 --chunk-size 20000
+    cat answers.csv | python main.py - --format csv > results.csv
+
+The parent process reads the input in chunks of --chunk-size rows. A pool
+of --workers processes scores each chunk (core/bulk.py), and the parent
+writes chunks in input order as they finish. At most two chunks per worker
+are in flight, so memory stays constant whatever the input size. Progress
+goes to stderr, followed by a throughput summary.
+"""
+import argparse
+import json
+import os
+import sys
+from typing import List, Optional, TextIO
+
+from core.bulk import DEFAULT_CHUNK_SIZE, FORMATS, Progress, score_stream
+
+
+def _infer_format(path: str) -> Optional[str]:
+    suffix = os.path.splitext(path)[1].lower()
+    return {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}.get(suffix)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="answers file (.csv, .jsonl), or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="results file, or - for stdout (default)")
+    parser.add_argument("--format", choices=FORMATS, help="input and output format (default: from the input file extension)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="scoring processes; 1 scores in this process")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per chunk handed to a worker")
+    parser.add_argument("--progress-seconds", type=float, default=1.0, help="interval between progress lines on stderr")
+    parser.add_argument("--quiet", action="store_true", help="no progress lines or summary")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or _infer_format(args.input)
+    if fmt is None:
+        parser.error("cannot tell the format from the input name; pass --format csv or --format jsonl")
+    if args.workers < 1 or args.chunk_size < 1:
+        parser.error("--workers and --chunk-size must be at least 1")
+
+    progress = Progress(sys.stderr, args.progress_seconds, not args.quiet)
+    newline = "" if fmt == "csv" else None
+    source: TextIO = sys.stdin
+    sink: TextIO = sys.stdout
+    try:
+        if args.input != "-":
+            source = open(args.input, newline=newline, encoding="utf-8")
+        if args.output != "-":
+            sink = open(args.output, "w", newline=newline, encoding="utf-8")
+        score_stream(source, sink, fmt, args.workers, args.chunk_size, progress)
+    except (ValueError, OSError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    if not args.quiet:
+        print(json.dumps(progress.summary(args.workers)), file=sys.stderr)
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
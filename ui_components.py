@@ -1,4 +1,111 @@
+import os
+from pathlib import Path
+
 import streamlit as st
+import streamlit.components.v1 as components
+
+# "client" renders quiz answer tiles in a browser component that only reports
+# back on Back/Next; "server" renders one st.button per tile.
+QUIZ_TILES_MODE = os.environ.get("CC_QUIZ_TILES", "client").strip().lower()
+QUIZ_TILES_KEY = "quiz_tiles"
+# Runs the whole seven-question flow in the browser and reports once, at the
+# end; the server only reruns for the results.
+CLIENT_QUIZ = os.environ.get("CC_CLIENT_QUIZ", "").strip().lower() in ("1", "true", "yes", "on")
+
+# Widget key of the stylesheet injector; its "digest" state is the bundle the browser applied.
+CSS_INJECTOR_KEY = "css_injector"
+
+_quiz_tiles_component = None
+_css_injector_component = None
+_click_beacon_component = None
+
+
+def _get_quiz_tiles_component():
+    # Declared on first use: declare_component() looks up the calling module
+    # with inspect, which costs tens of milliseconds in a fresh process, and
+    # the landing page does not need the component.
+    global _quiz_tiles_component
+    if _quiz_tiles_component is None:
+        _quiz_tiles_component = components.declare_component(
+            "quiz_tiles",
+            path=str(Path(__file__).resolve().parent / "frontend" / "quiz_tiles"),
+        )
+    return _quiz_tiles_component
+
+
+# Runs in the app page (components v2 mount no iframe). The <style> goes into
+# the page head, so it outlives the component, which inject_styles() stops
+# rendering once the digest is reported back.
+_CSS_INJECTOR_JS = """
+export default function ({ data, setStateValue }) {
+    const id = "cc-css-" + data.digest;
+    if (!document.getElementById(id)) {
+        document.querySelectorAll("style[data-cc-bundle]").forEach((el) => el.remove());
+        const style = document.createElement("style");
+        style.id = id;
+        style.dataset.ccBundle = "1";
+        style.textContent = data.css;
+        document.head.appendChild(style);
+    }
+    setStateValue("digest", data.digest);
+}
+"""
+
+
+def _ignore():
+    pass
+
+
+def css_injector(digest, css, key=CSS_INJECTOR_KEY):
+    """Add the stylesheet bundle to the page; ``st.session_state[key]["digest"]`` becomes ``digest`` once it has."""
+    global _css_injector_component
+    if _css_injector_component is None:
+        _css_injector_component = st.components.v2.component("cc_css_injector", js=_CSS_INJECTOR_JS)
+    return _css_injector_component(
+        key=key,
+        data={"digest": digest, "css": css},
+        default={"digest": None},
+        on_digest_change=_ignore,
+    )
+
+
+# Also runs in the app page. One capturing listener per page reports clicks on
+# links matching the selector with navigator.sendBeacon(), which outlives the
+# navigation; the link itself goes straight to its target. Later mounts only
+# update what is reported.
+_CLICK_BEACON_JS = """
+export default function ({ data }) {
+    window.ccClickBeacon = data;
+    if (window.ccClickBeaconBound) {
+        return;
+    }
+    window.ccClickBeaconBound = true;
+    document.addEventListener("click", (event) => {
+        const beacon = window.ccClickBeacon;
+        const link = event.target.closest && event.target.closest(beacon.selector);
+        if (!link) {
+            return;
+        }
+        const url = beacon.url || (beacon.port ? `${location.protocol}//${location.hostname}:${beacon.port}/track` : "");
+        if (url) {
+            const query = new URLSearchParams({ event: beacon.event, detail: beacon.detail });
+            navigator.sendBeacon(`${url}?${query}`);
+        }
+    }, true);
+}
+"""
+
+
+def click_beacon(selector, event, detail, url="", port=0, key="click_beacon"):
+    """Report clicks on links matching ``selector`` as ``event``/``detail`` to ``url``, or /track on ``port`` of the page's host."""
+    global _click_beacon_component
+    if _click_beacon_component is None:
+        _click_beacon_component = st.components.v2.component("cc_click_beacon", js=_CLICK_BEACON_JS)
+    return _click_beacon_component(
+        key=key,
+        data={"selector": selector, "event": event, "detail": detail, "url": url, "port": port},
+    )
+
 
 def start_cta():
     st.markdown(
@@ -49,3 +156,24 @@ def start_cta():
         """,
         unsafe_allow_html=True,
     )
+
+
+def quiz_tiles(questions, answers, offset, total, mode="step", index=0, key=QUIZ_TILES_KEY):
+    """Render questions as selectable tiles with Back/Next in the browser.
+
+    Selection and highlighting happen client-side; the component value only
+    changes when Back/Next/Results is pressed, as a dict with ``action``
+    ("back", "next" or "submit"), the absolute question ``index``, the
+    ``answers`` dict and a unique ``nonce``. In ``mode="full"`` Back/Next
+    move between ``questions`` in the browser and only "submit" is reported.
+    """
+    return _get_quiz_tiles_component()(
+        questions=questions,
+        answers=answers,
+        offset=offset,
+        total=total,
+        mode=mode,
+        index=index,
+        key=key,
+        default=None,
+    )